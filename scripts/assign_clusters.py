@@ -1,17 +1,21 @@
 import argparse
 import os
 import sys
-from typing import List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit, prange  # type: ignore
+except ImportError:  # numba is optional; only needed for --search numba
+    njit = None
+    prange = range
 
-def load_embeddings(cache_path: str) -> Tuple[np.ndarray, List[str]]:
-    data = np.load(cache_path, allow_pickle=True)
-    embeddings = data["embeddings"].astype(np.float32, copy=False)
-    paths = [str(p) for p in data["paths"].tolist()]
-    return embeddings, paths
+from embedding_cache import load_embeddings
+
+# Per-core L2 size assumed when sizing the centroid tiles of the exact search
+L2_CACHE_BYTES = 1 << 20
 
 
 def resolve_cache_paths(cache_dir: str, backend: str, model: str, pretrained: str) -> Tuple[str, str]:
@@ -34,10 +38,141 @@ def resolve_cache_paths(cache_dir: str, backend: str, model: str, pretrained: st
     return unique_cache, real_cache
 
 
-def compute_argmax_clusters(real: np.ndarray, unique: np.ndarray, chunk_size: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+def compute_argmax_clusters_hnsw(real: np.ndarray, unique: np.ndarray, hnsw_m: int = 32, ef_search: int = 128) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Approximate top-1 search with a FAISS HNSW graph over the centroids (inner product == cosine
+    on L2-normalized vectors). Sublinear in M, so it pays off once there are thousands of centroids.
+    Same return contract as compute_argmax_clusters.
+    """
+    import faiss  # type: ignore
+
+    d = unique.shape[1]
+    index = faiss.IndexHNSWFlat(d, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efSearch = ef_search
+    index.add(np.ascontiguousarray(unique, dtype=np.float32))
+    sims, idx = index.search(np.ascontiguousarray(real, dtype=np.float32), 1)
+    return idx[:, 0].astype(np.int64), sims[:, 0].astype(np.float32)
+
+
+def quantize_int8(x: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Symmetric int8 quantization of L2-normalized rows (every component lies in [-1, 1]).
+    Returns (codes, scale) with x ~= codes * scale.
+    """
+    codes = np.clip(np.round(x * 127.0), -128, 127).astype(np.int8)
+    return codes, 1.0 / 127.0
+
+
+def compute_argmax_clusters_int8(real: np.ndarray, unique: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-1 search over int8-quantized centroids with a FAISS scalar-quantizer index, whose
+    inner-product kernels are SIMD (VNNI where available). 4x less bandwidth for the centroid
+    matrix; similarities carry ~1e-2 quantization error. Same return contract as compute_argmax_clusters.
+    """
+    import faiss  # type: ignore
+
+    unique_q, u_scale = quantize_int8(unique)
+    real_q, r_scale = quantize_int8(real)
+    index = faiss.IndexScalarQuantizer(unique.shape[1], faiss.ScalarQuantizer.QT_8bit_direct_signed, faiss.METRIC_INNER_PRODUCT)
+    index.add(unique_q.astype(np.float32))
+    sims, idx = index.search(real_q.astype(np.float32), 1)
+    return idx[:, 0].astype(np.int64), (sims[:, 0] * (u_scale * r_scale)).astype(np.float32)
+
+
+def make_argmax_kernel(D: int) -> Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], None]:
+    """
+    Build the fused dot-product + running-max kernel for a fixed embedding dim D. D is a
+    compile-time constant inside the kernel, so numba/LLVM can fully unroll and vectorize the
+    dot product instead of running a generic-length loop. Parallel over rows of real; the
+    [N, M] similarity matrix is never materialized.
+    """
+
+    def argmax_cosine_kernel(real: np.ndarray, unique: np.ndarray, best_idx: np.ndarray, best_sim: np.ndarray) -> None:
+        N = real.shape[0]
+        M = unique.shape[0]
+        for i in prange(N):
+            best = -np.inf
+            bi = 0
+            for j in range(M):
+                s = 0.0
+                for k in range(D):
+                    s += real[i, k] * unique[j, k]
+                if s > best:
+                    best = s
+                    bi = j
+            best_idx[i] = bi
+            best_sim[i] = best
+
+    if njit is not None:
+        # Only the flags the dot product needs to vectorize: fastmath=True would also set ninf/nnan,
+        # under which the comparison against the -inf seed of the running max is undefined
+        argmax_cosine_kernel = njit(parallel=True, fastmath={"reassoc", "contract", "arcp"})(argmax_cosine_kernel)
+    return argmax_cosine_kernel
+
+
+# One specialized kernel per embedding dim (CLIP ViT-B/32 / SSCD = 512, DINOv2 = 768)
+_ARGMAX_KERNELS: Dict[int, Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], None]] = {}
+
+
+def compute_argmax_clusters_numba(real: np.ndarray, unique: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Same return contract as compute_argmax_clusters, via the kernel specialized for this D."""
+    N, D = real.shape
+    kernel = _ARGMAX_KERNELS.get(D)
+    if kernel is None:
+        kernel = _ARGMAX_KERNELS[D] = make_argmax_kernel(D)
+    best_idx = np.empty(N, dtype=np.int64)
+    best_sim = np.empty(N, dtype=np.float32)
+    kernel(np.ascontiguousarray(real, dtype=np.float32), np.ascontiguousarray(unique, dtype=np.float32), best_idx, best_sim)
+    return best_idx, best_sim
+
+
+def compute_argmax_clusters_torch(real: np.ndarray, unique: np.ndarray, chunk_size: int = 65536, device: str = "cuda") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chunked cosine argmax in torch with half-precision operands and the max/argmax reduction
+    fused on-device. On "cuda" operands are FP16 so cuBLAS can use Tensor Cores; on "cpu" they
+    are BF16 so oneDNN can use AMX/AVX-512 BF16 kernels. Ranking only needs a few significant
+    bits on L2-normalized inputs; best_sim is returned as float32.
+    Same return contract as compute_argmax_clusters.
+    """
+    import torch  # type: ignore
+
+    dtype = torch.float16 if device == "cuda" else torch.bfloat16
+    N = real.shape[0]
+    best_idx = np.empty(N, dtype=np.int64)
+    best_sim = np.empty(N, dtype=np.float32)
+    with torch.inference_mode():
+        u_t = torch.from_numpy(np.ascontiguousarray(unique)).to(device=device, dtype=dtype).t().contiguous()  # [D, M]
+        for start in range(0, N, chunk_size):
+            end = min(start + chunk_size, N)
+            r = torch.from_numpy(np.ascontiguousarray(real[start:end]))
+            if device == "cuda":
+                r = r.pin_memory()
+            r = r.to(device=device, dtype=dtype, non_blocking=True)
+            val, idx = (r @ u_t).max(dim=1)
+            best_idx[start:end] = idx.cpu().numpy()
+            best_sim[start:end] = val.float().cpu().numpy()
+    return best_idx, best_sim
+
+
+def torch_available(device: str) -> bool:
+    try:
+        import torch  # type: ignore
+    except ImportError:
+        return False
+    return device != "cuda" or torch.cuda.is_available()
+
+
+def compute_argmax_clusters(
+    real: np.ndarray, unique: np.ndarray, chunk_size: int = 65536, search: str = "exact", m_block: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
     """
     real: [N, D] L2-normalized
     unique: [M, D] L2-normalized
+    m_block: centroids per tile on the exact path (defaults to half the L2 cache worth of rows)
+    search: "exact" (chunked matmul), "hnsw" (FAISS approximate top-1), "int8" (FAISS int8 scalar
+            quantizer), "numba" (fused parallel kernel), "bf16" (BF16 torch matmul on CPU) or
+            "cuda" (FP16 torch matmul on GPU);
+            the accelerated paths fall back to exact when their dependency is unavailable
     Returns:
       - best_idx: [N] index of nearest centroid by cosine similarity
       - best_sim: [N] corresponding similarity value
@@ -45,19 +180,62 @@ def compute_argmax_clusters(real: np.ndarray, unique: np.ndarray, chunk_size: in
     N, D = real.shape
     M, D2 = unique.shape
     assert D == D2, "Embedding dims must match"
-    best_idx = np.empty(N, dtype=np.int64)
-    best_sim = np.empty(N, dtype=np.float32)
+    if search == "hnsw":
+        try:
+            return compute_argmax_clusters_hnsw(real, unique)
+        except ImportError:
+            print("faiss not available; falling back to exact search")
+    elif search == "int8":
+        try:
+            return compute_argmax_clusters_int8(real, unique)
+        except ImportError:
+            print("faiss not available; falling back to exact search")
+    elif search == "numba":
+        if njit is not None:
+            return compute_argmax_clusters_numba(real, unique)
+        print("numba not available; falling back to exact search")
+    elif search in ("bf16", "cuda"):
+        device = "cuda" if search == "cuda" else "cpu"
+        if torch_available(device):
+            return compute_argmax_clusters_torch(real, unique, chunk_size, device)
+        print(f"torch ({device}) not available; falling back to exact search")
+    best_idx = np.zeros(N, dtype=np.int64)
+    best_sim = np.full(N, -np.inf, dtype=np.float32)
 
-    for start in range(0, N, chunk_size):
-        end = min(start + chunk_size, N)
-        sims = real[start:end] @ unique.T  # [chunk, M]
-        idx = sims.argmax(axis=1)
-        val = sims[np.arange(sims.shape[0]), idx]
-        best_idx[start:end] = idx
-        best_sim[start:end] = val
+    # Tile over M too, so each block of centroids stays cache-resident while all of real streams past it
+    if m_block is None:
+        m_block = L2_CACHE_BYTES // (D * 4) // 2
+    m_block = max(1, min(M, m_block))
+    # Reuse one [chunk, m_block] buffer for every tile's similarities
+    sims_buf = np.empty(min(chunk_size, N) * m_block, dtype=np.float32)
+    for m0 in range(0, M, m_block):
+        m1 = min(m0 + m_block, M)
+        # Contiguous [D, m_block] copy made once per tile, so every chunk hits BLAS's plain NN path
+        unique_blk = np.ascontiguousarray(unique[m0:m1].T)
+        for start in range(0, N, chunk_size):
+            end = min(start + chunk_size, N)
+            sims = sims_buf[: (end - start) * (m1 - m0)].reshape(end - start, m1 - m0)
+            np.matmul(real[start:end], unique_blk, out=sims)  # [chunk, m_block]
+            idx = sims.argmax(axis=1)
+            val = np.take_along_axis(sims, idx[:, None], axis=1).reshape(-1)
+            # Strict > keeps the earliest centroid on ties, matching a single argmax over all M
+            better = val > best_sim[start:end]
+            best_idx[start:end] = np.where(better, idx + m0, best_idx[start:end])
+            best_sim[start:end] = np.where(better, val, best_sim[start:end])
     return best_idx, best_sim
 
 
+def write_csv(columns: Dict[str, Any], path: str) -> None:
+    """Write columns to CSV with pyarrow's vectorized C++ writer when installed, else pandas."""
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.csv as pacsv  # type: ignore
+    except ImportError:
+        pd.DataFrame(columns).to_csv(path, index=False)
+        return
+    pacsv.write_csv(pa.table(columns), path, write_options=pacsv.WriteOptions(quoting_style="needed"))
+
+
 def main(argv: List[str]) -> None:
     parser = argparse.ArgumentParser(
         description="Assign each real image to the nearest unique centroid using cached embeddings (cosine argmax)."
@@ -68,40 +246,49 @@ def main(argv: List[str]) -> None:
     parser.add_argument("--out_dir", type=str, default="/workspace/clip_results", help="Pipeline output directory")
     parser.add_argument("--cache_dir", type=str, default=None, help="Embeddings cache directory (defaults to out_dir/embeddings)")
     parser.add_argument("--counts_only", action="store_true", help="Also output per-cluster counts CSV")
+    parser.add_argument("--preload", action="store_true", help="Read real embeddings into RAM instead of memory-mapping them")
+    parser.add_argument("--search", type=str, default="exact", choices=["exact", "hnsw", "int8", "numba", "bf16", "cuda"], help="Nearest-centroid search (hnsw/int8 are approximate and need faiss; numba fuses matmul+argmax; bf16/cuda run half-precision torch matmuls on CPU/GPU)")
     args = parser.parse_args(argv)
 
     cache_dir = args.cache_dir or os.path.join(args.out_dir, "embeddings")
     unique_cache, real_cache = resolve_cache_paths(cache_dir, args.backend, args.model, args.pretrained)
 
-    unique_embeds, unique_paths = load_embeddings(unique_cache)
-    real_embeds, real_paths = load_embeddings(real_cache)
+    unique_embeds, unique_paths = load_embeddings(unique_cache, preload=True)
+    real_embeds, real_paths = load_embeddings(real_cache, preload=args.preload)
 
     # Compute nearest centroid per real image
-    best_idx, best_sim = compute_argmax_clusters(real_embeds, unique_embeds)
-    best_unique_paths = [unique_paths[i] for i in best_idx.tolist()]
-    best_unique_basenames = [os.path.basename(p) for p in best_unique_paths]
+    best_idx, best_sim = compute_argmax_clusters(real_embeds, unique_embeds, search=args.search)
+    # Take basenames once per centroid (M), then gather both columns with fancy indexing (N)
+    unique_paths_arr = np.asarray(unique_paths, dtype=object)
+    unique_basenames = np.array([os.path.basename(path) for path in unique_paths], dtype=object)
+    best_unique_paths = unique_paths_arr[best_idx]
+    best_unique_basenames = unique_basenames[best_idx]
 
     # Write assignments CSV
     os.makedirs(args.out_dir, exist_ok=True)
     assign_csv = os.path.join(args.out_dir, "cluster_assignments.csv")
-    df = pd.DataFrame({
+    columns = {
         "image_path": real_paths,
         "cluster_unique_image": best_unique_paths,
         "cluster_unique_basename": best_unique_basenames,
         "similarity": best_sim.astype(np.float32),
         "cluster_index": best_idx.astype(np.int64),
-    })
-    df.to_csv(assign_csv, index=False)
+    }
+    write_csv(columns, assign_csv)
     print(f"Wrote cluster assignments to: {assign_csv}")
 
     if args.counts_only:
-        counts = df.groupby(["cluster_unique_image", "cluster_unique_basename"]).size().reset_index(name="count")
+        # best_idx is already an integer key in [0, M): count with bincount, list non-empty clusters by path
+        counts = np.bincount(best_idx, minlength=len(unique_paths))
+        used = sorted(np.flatnonzero(counts).tolist(), key=lambda i: unique_paths[i])
         counts_csv = os.path.join(args.out_dir, "cluster_counts.csv")
-        counts.to_csv(counts_csv, index=False)
+        write_csv({
+            "cluster_unique_image": unique_paths_arr[used],
+            "cluster_unique_basename": unique_basenames[used],
+            "count": counts[used].astype(np.int64),
+        }, counts_csv)
         print(f"Wrote cluster counts to: {counts_csv}")
 
 
 if __name__ == "__main__":
     main(sys.argv[1:])
-
-
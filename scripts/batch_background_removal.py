@@ -6,12 +6,14 @@ and saves clean backgrounds to Real_bg_after with day_bg_001, night_bg_001 namin
 """
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from PIL import Image
 from io import BytesIO
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import time
 
 # Load environment variables from .env file
@@ -36,6 +38,39 @@ prompt = (
     "- No visible signs of editing or manipulation"
 )
 
+# Concurrency / rate limiting for the Gemini calls
+MAX_WORKERS = 8          # requests kept in flight
+IO_WORKERS = 2           # threads for reading inputs, and separately for saving outputs
+PREFETCH = 2             # inputs read ahead of the requests in flight
+MIN_INTERVAL = 1.0       # minimum seconds between request starts
+MAX_INTERVAL = 60.0      # cap for the adaptive backoff
+MAX_ATTEMPTS = 4         # tries per image when rate limited (HTTP 429)
+
+class AdaptiveRateLimiter:
+    """Spaces request starts by `interval` seconds; doubles it on 429s and eases it back on success."""
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        time.sleep(start - now)
+
+    def on_rate_limited(self):
+        with self._lock:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+    def on_success(self):
+        with self._lock:
+            self.interval = max(self.interval * 0.9, self.min_interval)
+
 def create_output_folders(base_path):
     """Create the Real_bg_after folder structure."""
     bg_after_path = base_path / "Real_bg_after"
@@ -48,37 +83,68 @@ def create_output_folders(base_path):
     
     return day_path, night_path
 
-def process_image(image_path, output_path, prefix, image_id):
-    """Process a single image through the background removal pipeline."""
+def generate_with_backoff(contents, limiter):
+    """Call Gemini under the shared rate limiter, retrying with a longer interval on 429s."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        limiter.wait()
+        try:
+            response = client.models.generate_content(
+                model="gemini-2.5-flash-image-preview",
+                contents=contents,
+            )
+        except errors.APIError as e:
+            if e.code != 429 or attempt == MAX_ATTEMPTS:
+                raise
+            limiter.on_rate_limited()
+            print(f"    ⏳ Rate limited, retrying (attempt {attempt + 1}/{MAX_ATTEMPTS})")
+            continue
+        limiter.on_success()
+        return response
+
+def read_image_part(image_path):
+    """Read the raw file bytes as a Gemini Part (no Pillow decode/re-encode before upload)."""
+    mime_type = "image/png" if image_path.suffix.lower() == ".png" else "image/jpeg"
+    return types.Part.from_bytes(data=image_path.read_bytes(), mime_type=mime_type)
+
+def save_image(data, output_filepath):
+    """Decode the returned image and save it as JPEG (runs on the I/O pool)."""
+    try:
+        Image.open(BytesIO(data)).save(output_filepath)
+        print(f"    ✅ Saved: {output_filepath.name}")
+        return True
+    except Exception as e:
+        print(f"    ❌ Error saving {output_filepath.name}: {e}")
+        return False
+
+def process_image(image_path, image_part, output_path, prefix, image_id, limiter, save_pool):
+    """
+    Process a single image through the background removal pipeline.
+    image_part is a future for the prefetched input; the save is handed to save_pool,
+    whose future is returned (None when nothing was generated).
+    """
     try:
         print(f"  Processing {image_path.name}...")
         
-        # Load the input image
-        image = Image.open(image_path)
+        # Wait for the prefetched input image
+        image = image_part.result()
         
         # Generate content using both text prompt and image
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-image-preview",
-            contents=[prompt, image],
-        )
+        response = generate_with_backoff([prompt, image], limiter)
         
         # Process the response
         for part in response.candidates[0].content.parts:
             if part.inline_data is not None:
-                # Save the generated clean background image
-                cleaned_image = Image.open(BytesIO(part.inline_data.data))
+                # Save the generated clean background image off the network thread
                 output_filename = f"{prefix}_bg_{image_id:03d}.jpg"
                 output_filepath = output_path / output_filename
-                cleaned_image.save(output_filepath)
-                print(f"    ✅ Saved: {output_filename}")
-                return True
+                return save_pool.submit(save_image, part.inline_data.data, output_filepath)
         
         print(f"    ❌ No image data returned for {image_path.name}")
-        return False
+        return None
         
     except Exception as e:
         print(f"    ❌ Error processing {image_path.name}: {e}")
-        return False
+        return None
 
 def process_folder(folder_path, output_path, prefix):
     """Process all images in a folder."""
@@ -100,14 +166,29 @@ def process_folder(folder_path, output_path, prefix):
     # Sort files for consistent processing
     image_files.sort(key=lambda x: x.name)
     
+    # Keep several requests in flight; the limiter paces request starts instead of a fixed sleep.
+    # Disk reads and saves run on their own small pools so they overlap with the API calls (and
+    # saves never queue behind reads). An image's read is only submitted once a slot frees up, so
+    # at most MAX_WORKERS + PREFETCH inputs are read or held at a time.
+    limiter = AdaptiveRateLimiter()
     successful_count = 0
-    for i, image_file in enumerate(image_files, 1):
-        success = process_image(image_file, output_path, prefix, i)
-        if success:
-            successful_count += 1
-        
-        # Add a small delay to avoid rate limiting
-        time.sleep(1)
+    slots = threading.BoundedSemaphore(MAX_WORKERS + PREFETCH)
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as read_pool, \
+            ThreadPoolExecutor(max_workers=IO_WORKERS) as save_pool, \
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as net_pool:
+        futures = []
+        for i, image_file in enumerate(image_files, 1):
+            slots.acquire()
+            future = net_pool.submit(
+                process_image, image_file, read_pool.submit(read_image_part, image_file),
+                output_path, prefix, i, limiter, save_pool,
+            )
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+        for future in as_completed(futures):
+            saved = future.result()
+            if saved is not None and saved.result():
+                successful_count += 1
     
     print(f"✅ Successfully processed {successful_count}/{len(image_files)} images from {folder_path.name}/")
     return successful_count
@@ -1,17 +1,22 @@
 import argparse
+import csv
 import os
 import sys
 from typing import List, Tuple
 
 import numpy as np
-import pandas as pd
 
+try:
+    from numba import njit  # type: ignore
+except ImportError:  # numba is optional; dedupe_range_search falls back to a Python loop
+    njit = None
 
-def load_embeddings(cache_path: str) -> Tuple[np.ndarray, List[str]]:
-    data = np.load(cache_path, allow_pickle=True)
-    embeddings = data["embeddings"].astype(np.float32, copy=False)
-    paths = [str(p) for p in data["paths"].tolist()]
-    return embeddings, paths
+from embedding_cache import load_embeddings
+
+# Approximate index settings for dedupe_range_search
+ANN_MIN_N = 10000
+IVF_NPROBE = 32
+HNSW_EF_SEARCH = 128
 
 
 def resolve_cache_paths(cache_dir: str, backend: str, model: str, pretrained: str) -> str:
@@ -26,16 +31,90 @@ def resolve_cache_paths(cache_dir: str, backend: str, model: str, pretrained: st
 
 
 def l2_normalize(x: np.ndarray) -> np.ndarray:
-    norms = np.linalg.norm(x, axis=1, keepdims=True)
-    norms = np.maximum(norms, 1e-6)
-    return (x / norms).astype(np.float32, copy=False)
+    """Row-normalize in place (no N x D temporary); returns the normalized float32 array."""
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    if not x.flags.writeable:  # e.g. a read-only memory map
+        x = x.copy()
+    sq_norms = np.einsum("ij,ij->i", x, x)
+    inv_norms = 1.0 / np.sqrt(np.maximum(sq_norms, 1e-12))
+    x *= inv_norms[:, None]
+    return x
+
+
+def greedy_group_kernel(
+    lims: np.ndarray,
+    I: np.ndarray,
+    D: np.ndarray,
+    threshold: np.float32,
+    assigned: np.ndarray,
+    members: np.ndarray,
+    member_sims: np.ndarray,
+    offsets: np.ndarray,
+) -> int:
+    """
+    Greedy grouping over FAISS range_search results, written as plain loops so numba can compile it.
+    Fills members/member_sims (CSR order, representative first) and offsets[: n_groups + 1].
+    Returns the number of groups.
+    """
+    n = assigned.shape[0]
+    pos = 0
+    n_groups = 0
+    for i in range(n):
+        if assigned[i]:
+            continue
+        offsets[n_groups] = pos
+        assigned[i] = True
+        members[pos] = i
+        member_sims[pos] = 1.0
+        pos += 1
+        for t in range(lims[i], lims[i + 1]):
+            j = I[t]
+            if j == i:
+                continue
+            if D[t] >= threshold and not assigned[j]:
+                assigned[j] = True
+                members[pos] = j
+                member_sims[pos] = D[t]
+                pos += 1
+        n_groups += 1
+    offsets[n_groups] = pos
+    return n_groups
+
 
+if njit is not None:
+    greedy_group_kernel = njit(cache=True)(greedy_group_kernel)
 
-def dedupe_range_search(real: np.ndarray, threshold: float) -> Tuple[List[List[int]], List[List[float]]]:
+
+def build_index(faiss, real: np.ndarray, index_type: str):
+    """
+    Inner-product index over real for range search. "flat" is exact and O(N^2 * D) over the sweep;
+    "ivf" and "hnsw" are approximate but scale sublinearly per query. Below ANN_MIN_N vectors
+    brute force wins (no training / graph build), so the approximate types fall back to flat.
+    """
+    n, d = real.shape
+    if index_type != "flat" and n < ANN_MIN_N:
+        print(f"{n} vectors < {ANN_MIN_N}; using exact IndexFlatIP instead of {index_type}")
+        index_type = "flat"
+    if index_type == "ivf":
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFFlat(quantizer, d, int(4 * np.sqrt(n)), faiss.METRIC_INNER_PRODUCT)
+        index.train(real)
+        index.nprobe = IVF_NPROBE
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    else:
+        index = faiss.IndexFlatIP(d)
+    index.add(real)
+    return index
+
+
+def dedupe_range_search(real: np.ndarray, threshold: float, index_type: str = "flat") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Use FAISS range search (cosine via IP on normalized vectors) to build duplicate groups.
     Greedy grouping: take i as representative, assign all neighbors >= threshold not yet assigned.
-    Returns list of groups (indices) and parallel list of similarities to representative.
+    Returns groups in CSR form: offsets [n_groups + 1], members [N] (representative first in each
+    group) and member_sims [N] (similarity to the representative).
     """
     try:
         import faiss  # type: ignore
@@ -43,57 +122,63 @@ def dedupe_range_search(real: np.ndarray, threshold: float) -> Tuple[List[List[i
         raise RuntimeError("faiss is required: pip install faiss-cpu") from exc
 
     n, d = real.shape
-    index = faiss.IndexFlatIP(d)
-    index.add(real)
+    index = build_index(faiss, real, index_type)
     # Range search
     lims, D, I = index.range_search(real, threshold)
-    groups: List[List[int]] = []
-    group_sims: List[List[float]] = []
-    assigned = np.zeros(n, dtype=bool)
+    # Every vector lands in exactly one group, so the flat member arrays have n slots
+    assigned = np.zeros(n, dtype=np.bool_)
+    members = np.empty(n, dtype=np.int64)
+    member_sims = np.empty(n, dtype=np.float32)
+    offsets = np.empty(n + 1, dtype=np.int64)
+    if njit is not None:
+        n_groups = greedy_group_kernel(lims, I, D, np.float32(threshold), assigned, members, member_sims, offsets)
+        return offsets[: n_groups + 1], members, member_sims
+
+    pos = 0
+    n_groups = 0
     for i in range(n):
         if assigned[i]:
             continue
         start, end = lims[i], lims[i + 1]
         neigh_idx = I[start:end]
         neigh_sim = D[start:end]
-        # Include only neighbors not yet assigned, and avoid duplicates; keep i first
-        group = [i]
-        sims = [1.0]
-        for j, s in zip(neigh_idx, neigh_sim):
-            if j == i:
-                continue
-            if s >= threshold and not assigned[j]:
-                group.append(int(j))
-                sims.append(float(s))
-        for j in group:
-            assigned[j] = True
-        groups.append(group)
-        group_sims.append(sims)
-    return groups, group_sims
-
-
-def write_outputs(out_dir: str, paths: List[str], groups: List[List[int]], group_sims: List[List[float]]) -> None:
+        # Include only neighbors not yet assigned, and avoid duplicates; keep i first.
+        # range_search only returns neighbors above the threshold, so no similarity test is needed.
+        mask = (neigh_idx != i) & ~assigned[neigh_idx]
+        group = neigh_idx[mask]
+        assigned[i] = True
+        assigned[group] = True
+        offsets[n_groups] = pos
+        members[pos] = i
+        member_sims[pos] = 1.0
+        members[pos + 1 : pos + 1 + len(group)] = group
+        member_sims[pos + 1 : pos + 1 + len(group)] = neigh_sim[mask]
+        pos += 1 + len(group)
+        n_groups += 1
+    offsets[n_groups] = pos
+    return offsets[: n_groups + 1], members, member_sims
+
+
+def write_outputs(out_dir: str, paths: List[str], offsets: np.ndarray, members: np.ndarray, member_sims: np.ndarray) -> None:
     os.makedirs(out_dir, exist_ok=True)
     keep = []
     remove = []
-    records = []
-    for gid, (idxs, sims) in enumerate(zip(groups, group_sims), start=1):
-        rep = idxs[0]
-        rep_path = paths[rep]
-        keep.append(rep_path)
-        for k, (j, s) in enumerate(zip(idxs, sims)):
-            records.append(
-                {
-                    "group_id": gid,
-                    "representative": rep_path,
-                    "member_path": paths[j],
-                    "similarity_to_rep": float(s),
-                    "is_representative": int(k == 0),
-                }
-            )
-            if k > 0:
-                remove.append(paths[j])
-    pd.DataFrame.from_records(records).to_csv(os.path.join(out_dir, "dedupe_groups.csv"), index=False)
+    bounds = offsets.tolist()
+    member_list = members.tolist()
+    sim_list = member_sims.tolist()
+    # Stream rows straight to the CSV instead of collecting records for a DataFrame
+    with open(os.path.join(out_dir, "dedupe_groups.csv"), "w", newline="", buffering=1 << 20) as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(("group_id", "representative", "member_path", "similarity_to_rep", "is_representative"))
+        for gid in range(1, len(bounds)):
+            start, end = bounds[gid - 1], bounds[gid]
+            rep_path = paths[member_list[start]]
+            keep.append(rep_path)
+            writer.writerow((gid, rep_path, rep_path, sim_list[start], 1))
+            for k in range(start + 1, end):
+                member_path = paths[member_list[k]]
+                writer.writerow((gid, rep_path, member_path, sim_list[k], 0))
+                remove.append(member_path)
     with open(os.path.join(out_dir, "dedupe_keep.txt"), "w") as f:
         f.write("\n".join(keep) + ("\n" if keep else ""))
     with open(os.path.join(out_dir, "dedupe_remove.txt"), "w") as f:
@@ -108,20 +193,20 @@ def main(argv: List[str]) -> None:
     p.add_argument("--out_dir", type=str, required=True, help="Output directory where embeddings live and results will be written")
     p.add_argument("--cache_dir", type=str, default=None, help="Embeddings cache directory (defaults to out_dir/embeddings)")
     p.add_argument("--threshold", type=float, default=0.75, help="Cosine similarity threshold to consider duplicates")
+    p.add_argument("--index", type=str, default="flat", choices=["flat", "ivf", "hnsw"], help="FAISS index for range search (ivf/hnsw are approximate; used only for large N)")
     args = p.parse_args(argv)
 
     cache_dir = args.cache_dir or os.path.join(args.out_dir, "embeddings")
     real_cache = resolve_cache_paths(cache_dir, args.backend, args.model, args.pretrained)
-    real_embeds, real_paths = load_embeddings(real_cache)
+    # Normalization below rewrites every row, so read the whole matrix up front
+    real_embeds, real_paths = load_embeddings(real_cache, preload=True)
     # Ensure normalized (should already be)
     real_embeds = l2_normalize(real_embeds)
 
-    groups, group_sims = dedupe_range_search(real_embeds, args.threshold)
-    write_outputs(args.out_dir, real_paths, groups, group_sims)
+    offsets, members, member_sims = dedupe_range_search(real_embeds, args.threshold, args.index)
+    write_outputs(args.out_dir, real_paths, offsets, members, member_sims)
     print(f"Done. Wrote dedupe_groups.csv, dedupe_keep.txt, dedupe_remove.txt to {args.out_dir}")
 
 
 if __name__ == "__main__":
     main(sys.argv[1:])
-
-
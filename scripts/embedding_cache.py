@@ -0,0 +1,45 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+
+def load_embeddings(cache_path: str, preload: bool = False) -> Tuple[np.ndarray, List[str]]:
+    """
+    Load a cached (embeddings, paths) pair. The .npz is converted once into a sibling raw .npy plus
+    a .paths.txt list; later loads memory-map the .npy so only the pages actually read are paged in
+    (the sidecars are rebuilt unless both are at least as new as the .npz).
+    preload=True reads the whole matrix into RAM instead (better when it will be swept many times).
+    """
+    stem = os.path.splitext(cache_path)[0]
+    npy_path, paths_path = stem + ".npy", stem + ".paths.txt"
+    if (
+        os.path.isfile(npy_path)
+        and os.path.isfile(paths_path)
+        and os.path.getmtime(npy_path) >= os.path.getmtime(cache_path)
+        and os.path.getmtime(paths_path) >= os.path.getmtime(cache_path)
+    ):
+        embeddings = np.load(npy_path, mmap_mode=None if preload else "r")
+        with open(paths_path) as f:
+            paths = f.read().splitlines()
+        return embeddings, paths
+
+    data = np.load(cache_path, allow_pickle=True)
+    embeddings = np.ascontiguousarray(data["embeddings"], dtype=np.float32)
+    paths = [str(p) for p in data["paths"].tolist()]
+    # Each sidecar is written to a temp name and renamed into place, paths first and .npy last, so an
+    # interrupted write never leaves a fresh .npy beside a missing or stale paths list
+    tmp_paths, tmp_npy = f"{paths_path}.{os.getpid()}.tmp", f"{npy_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_paths, "w") as f:
+            f.write("\n".join(paths) + ("\n" if paths else ""))
+        with open(tmp_npy, "wb") as f:
+            np.save(f, embeddings)
+        os.replace(tmp_paths, paths_path)
+        os.replace(tmp_npy, npy_path)
+    except OSError as exc:
+        for tmp in (tmp_paths, tmp_npy):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        print(f"Could not write memory-mappable cache next to {cache_path}: {exc}")
+    return embeddings, paths
@@ -6,127 +6,106 @@ Each fake background gets multiple synthetic person variations with background I
 """
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from PIL import Image
 from io import BytesIO
+import asyncio
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import fnmatch
+import functools
+import hashlib
+import itertools
+import logging
+from logging.handlers import MemoryHandler
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-import time
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 import random
 import secrets
+import struct
 import re
+import sys
+import time
+
+MODEL = "gemini-2.5-flash-image-preview"
+REQUEST_TIMEOUT_MS = 120_000  # per-request HTTP timeout, so a stalled call cannot hold a slot forever
+
+# Concurrency / retry settings for the Gemini calls
+MAX_CONCURRENT = 8       # requests kept in flight
+REQUESTS_PER_MINUTE = 60 # token-bucket refill rate; set to the project's Gemini RPM quota
+NUM_WORKERS = 2 * MAX_CONCURRENT  # queue consumers; the extras let saves overlap the next requests
+QUEUE_SIZE = 64          # jobs buffered ahead of the workers
+JPEG_QUALITY = 85        # output quality; the target look is compressed CCTV anyway
+IO_WORKERS = 4           # threads decoding/writing results (bounded so saves do not oversubscribe the disk)
+WRITE_BUFFER = 1 << 20   # bytes buffered per output file, so each image is written in a few syscalls
+ENCODE_PROCESSES = 0     # >0 decodes/encodes results in a process pool; only worth it if saving shows up in a profile
+MAX_ATTEMPTS = 5         # tries per request on rate limits (HTTP 429) and server errors (5xx)
+BACKOFF_BASE = 2.0       # seconds; doubled (with jitter) per attempt unless the API sends retry-after
+BACKOFF_MAX = 30.0       # cap for the exponential backoff
+CACHE_TTL = "3600s"      # lifetime of a background's cached content (deleted once it is done)
+VARIATIONS_PER_REQUEST = 1  # >1 asks for several variations of one background per request (experimental)
+MAX_PROMPT_DRAWS = 8     # redraws before accepting a prompt already used for the same background
+CANDIDATES_PER_REQUEST = 1  # >1 sets candidate_count so one prompt yields several images (if the model supports it)
+LOG_BUFFER = 100         # progress lines buffered per stdout write (warnings and errors flush at once)
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Create client (API key should be set as environment variable)
-client = genai.Client()
+# Prompt picker RNG: seeded once from the OS entropy pool, so every run still differs
+_rng = random.Random(secrets.randbits(64))
+
+# Filename patterns, compiled once
+_BG_ID_RE = re.compile(r'fake_(?:day|night)_bg_(\d+)')
+_OUTPUT_RE = re.compile(r'fake_(day|night)_synthetic_(\d+)_(\d{3})\.jpg')
 
 # Base prompt for adding realistic synthetic people to fake backgrounds
+# (grouped by topic so each constraint is stated once; CRITICAL items are mandatory)
 base_prompt = (
-    "Add exactly ONE realistic synthetic person to this surveillance camera scene. The person must: "
-    "- Look completely natural and fit seamlessly into the existing environment "
-    "- Have realistic body proportions and natural poses "
-    "- Match the surveillance camera quality (slightly blurry, not high-resolution) "
-    "- Have appropriate lighting and shadows that match the scene perfectly "
-    "- Blend seamlessly with the existing lighting conditions and camera angle "
-    "- Show natural surveillance camera characteristics (slight grain, desaturated colors) "
-    "- Appear as if they were originally captured by the same surveillance camera "
-    "- Maintain the same camera perspective and elevated angle as the background "
-    "- Have realistic but not hyper-detailed facial features (surveillance quality) "
-    "- Fit naturally into the existing scene without looking added or artificial "
-    "- CRITICAL: Create either ONE person OR TWO people maximum - no more than 2 people total "
-    "- CRITICAL: If creating 2 people, they should be walking together or interacting naturally "
-    "- CRITICAL: The person should NOT be looking directly at the camera "
-    "- The person should be looking away from the camera, at the ground, or in a natural direction "
-    "- The person should appear unaware they are being filmed (natural surveillance behavior) "
-    "- CRITICAL: Position the person near the EDGES or SIDES of the frame, NOT in the center "
-    "- CRITICAL: Most surveillance captures people walking along edges, sides, or perimeters "
-    "- CRITICAL: Avoid center-frame positioning - people are usually caught on the sides "
-    "- CRITICAL: Person's size must be PROPORTIONAL to their distance from camera "
-    "- CRITICAL: FOREGROUND person = LARGE (40-60% of frame height) - must look like a REAL PERSON with realistic features, not synthetic/fake "
-    "- CRITICAL: UP-CLOSE people must have REALISTIC facial features BUT heavily degraded CCTV quality "
-    "- CRITICAL: UP-CLOSE faces and upper bodies must be MORE PIXELATED, MORE GRAINY, MORE BLURRY than background "
-    "- CRITICAL: UP-CLOSE people need HEAVY compression artifacts, digital noise, and blur on face/skin "
-    "- CRITICAL: When you can see face clearly, make it EXTRA GRAINY and PIXELATED like low-quality CCTV "
-    "- CRITICAL: Face and upper body should be HEAVILY degraded - not high quality or sharp "
-    "- CRITICAL: MID-GROUND person = MEDIUM (20-30% of frame height) with moderate detail "
-    "- CRITICAL: BACKGROUND person = SMALL (15-25% of frame height) with clear visibility but less detail "
-    "- CRITICAL: Use realistic perspective scaling - people shrink with distance "
-    "- CRITICAL: Match the perspective and scale of any existing objects in the background "
-    "- CRITICAL: Person may be PARTIALLY CUT OFF by frame edges "
-    "- CRITICAL: Position should suggest they're passing through camera's field of view "
-    "- CRITICAL: The person must look like a REAL HUMAN being, not a fake/synthetic/artificial person "
-    "- CRITICAL: Realistic skin texture, natural facial features, authentic clothing wrinkles and folds "
-    "- CRITICAL: The person should look like an actual human caught on surveillance, not a generated image "
-    "- CRITICAL: Natural human proportions, realistic body language, authentic appearance "
-    "- CRITICAL: NO ARTIFACTS - person must have complete body parts (no missing feet, hands, legs, or body parts) "
-    "- CRITICAL: If feet are visible, they must be complete and properly attached "
-    "- CRITICAL: If hands are visible, they must be complete and properly formed "
-    "- CRITICAL: No distorted or incomplete body parts - ensure anatomical correctness "
-    "- CRITICAL: Person must be a complete, whole human figure without artifacts or glitches "
-    "- CRITICAL: The person must have the EXACT SAME blur, grain, and compression as the background "
-    "- CRITICAL: NOT sharper/cleaner than background - match the background's pixelation and noise level precisely "
-    "- CRITICAL: NOT more degraded than background - match the background's quality level exactly "
-    "- CRITICAL: The person should be indistinguishable in quality from the original background elements "
-    "- CRITICAL: Add slight motion blur consistent with surveillance frame rates "
-    "- CRITICAL: The person must blend into the CCTV footage style - grainy, slightly blurry, compressed "
-    "- CRITICAL: Match the EXACT surveillance camera aesthetic - not too clean, not too degraded "
-    "- CRITICAL: Make the person the SAME pixelation and degradation level as the background "
-    "- CRITICAL: The person should look like they were captured by the SAME camera as the background "
-    "- CRITICAL: Add appropriate motion blur, compression artifacts, and digital noise to match the background "
-    "- CRITICAL: The person should have consistent surveillance quality - not too high, not too low "
-    "- CRITICAL: For night scenes: make the person the SAME grainy and degraded level as the background "
-    "- CRITICAL: Person must have shadows matching the EXACT light sources in scene "
-    "- CRITICAL: NO studio lighting - match realistic poor surveillance lighting "
-    "- CRITICAL: Skin and clothing should have same lighting problems as environment "
-    "- CRITICAL: The person should look like they were added by a low-quality surveillance system "
-    "- QUALITY CONSISTENCY CHECK: Before finalizing the person, verify they match the background's blur, grain, compression, and overall degradation "
-    "- QUALITY CONSISTENCY CHECK: The person should NOT look like a sharp photograph pasted onto surveillance footage "
-    "- QUALITY CONSISTENCY CHECK: Apply the EXACT SAME camera quality degradation to the person as exists in the background "
-    "- QUALITY CONSISTENCY CHECK: If the deck railing is blurry, the person must be equally blurry "
-    "- QUALITY CONSISTENCY CHECK: If the grass has grain, the person must have identical grain "
-    "- QUALITY CONSISTENCY CHECK: The person should be INDISTINGUISHABLE in quality level from the background elements "
-    "- QUALITY CONSISTENCY CHECK: Match the background's pixelation, noise, compression artifacts, and blur level exactly "
-    "- QUALITY CONSISTENCY CHECK: The person must have the same surveillance camera quality as every other element in the scene "
+    "Add exactly ONE realistic synthetic person to this surveillance camera scene. "
+    "CRITICAL: ONE person OR TWO people maximum - if two, they are walking together or interacting naturally. "
+    "PERSON: "
+    "- CRITICAL: Must look like a REAL human caught on surveillance, not a fake/synthetic/generated image "
+    "- Realistic skin texture, natural facial features, authentic clothing wrinkles and folds, natural proportions and body language "
+    "- CRITICAL: NOT looking at the camera - looking away, at the ground, or in a natural direction, unaware of being filmed "
+    "POSITION: "
+    "- CRITICAL: Near the EDGES or SIDES of the frame, NOT in the center - passing through the camera's field of view "
+    "- May be PARTIALLY CUT OFF by frame edges "
+    "- Same camera perspective and elevated angle as the background "
+    "SCALE: "
+    "- CRITICAL: Size PROPORTIONAL to distance from camera, matching the scale of existing objects "
+    "- FOREGROUND = LARGE (40-60% of frame height); MID-GROUND = MEDIUM (20-30%) with moderate detail; "
+    "BACKGROUND = SMALL (15-25%) with clear visibility but less detail "
+    "- CRITICAL: UP-CLOSE faces and upper bodies keep realistic features but are HEAVILY degraded - "
+    "more pixelated, grainy and blurry, with compression artifacts and digital noise on face and skin "
+    "ANATOMY: "
+    "- CRITICAL: A complete, anatomically correct figure with no artifacts or glitches - "
+    "no missing or distorted feet, hands, legs or other body parts "
+    "LIGHTING: "
+    "- CRITICAL: Shadows match the EXACT light sources in the scene; NO studio lighting - "
+    "skin and clothing share the environment's poor surveillance lighting "
+    "QUALITY: "
+    "- CRITICAL: EXACTLY the same blur, grain, pixelation, compression artifacts, digital noise and desaturated colors "
+    "as the background - NOT sharper/cleaner and NOT more degraded "
+    "- Slight motion blur consistent with surveillance frame rates "
+    "- Must NOT look like a sharp photograph pasted onto the footage: if the deck railing is blurry the person is "
+    "equally blurry; if the grass has grain the person has identical grain "
+    "- For night scenes, the same grainy, degraded level as the background "
+    "- QUALITY CONSISTENCY CHECK: Before finalizing, verify the person is INDISTINGUISHABLE in quality "
+    "from every other element in the scene "
 )
 
 # Night-specific quality adjustments (CRITICAL for grayscale/monochrome)
 night_quality_prompt = (
     "CRITICAL: This is a NIGHT surveillance scene. The person must have: "
-    "- COMPLETELY GRAYSCALE/MONOCHROME appearance - NO colors visible whatsoever "
-    "- Only black, white, and gray tones - exactly like the background "
-    "- Match the night CCTV style with appropriate grain and noise "
-    "- The person should have the SAME level of grain and compression as the background "
-    "- Darker, more muted tones that match night lighting conditions "
-    "- Match the blur level and detail level of the background exactly "
-    "- Consistent grain and noise that matches the background's quality "
-    "- Match the contrast level of the night scene "
-    "- Lighting on clothing and skin should match the background's lighting quality "
-    "- Match the resolution and compression level of the surveillance background "
-    "- The person should have the same focus and motion blur as background elements "
-    "- CRITICAL: The person must look like a REALISTIC person with natural features "
-    "- CRITICAL: Match the background's quality level - not better, not worse "
-    "- CRITICAL: Apply the SAME blur, grain, and compression as the background shows "
-    "- CRITICAL: The person should blend seamlessly with the night CCTV aesthetic "
-    "- CRITICAL: Match the EXACT surveillance camera quality level of the background "
-    "- CRITICAL: The person should have consistent night CCTV quality matching the scene "
-    "- EXTRA CRITICAL FOR NIGHT: The person must NOT be looking at the camera "
-    "- The person should be looking down, away, or in a natural direction "
-    "- Night surveillance behavior: person appears completely unaware of being filmed "
-    "- The person should be focused on their activity, not the camera "
-    "- IMPORTANT: The person must match the background's quality - realistic but with CCTV characteristics "
-    "- The person should blend seamlessly with the night surveillance aesthetic "
-    "- CRITICAL: NO colors should be visible - only grayscale tones like the background "
-    "- QUALITY CONSISTENCY CHECK: The person must match the background's blur, grain, and compression exactly "
-    "- QUALITY CONSISTENCY CHECK: The person should NOT look like a sharp photograph pasted onto surveillance footage "
-    "- QUALITY CONSISTENCY CHECK: Apply the EXACT SAME camera quality as exists in the background "
-    "- QUALITY CONSISTENCY CHECK: If the background is blurry, the person must be equally blurry "
-    "- QUALITY CONSISTENCY CHECK: If the background has grain, the person must have identical grain "
-    "- QUALITY CONSISTENCY CHECK: The person should be INDISTINGUISHABLE in quality level from the background "
-    "- QUALITY CONSISTENCY CHECK: Match the background's quality exactly - not too clean, not too degraded "
-    "- QUALITY CONSISTENCY CHECK: The person must have the same surveillance camera quality as every other element in the scene "
+    "- CRITICAL: A COMPLETELY GRAYSCALE/MONOCHROME appearance - only black, white and gray tones like the background, NO colors "
+    "- Darker, muted tones and contrast matching the night lighting, including on clothing and skin "
+    "- CRITICAL: The SAME blur, grain, noise, focus, resolution and compression as the background - "
+    "a realistic person with night CCTV characteristics, not better, not worse "
+    "- EXTRA CRITICAL FOR NIGHT: NOT looking at the camera - looking down or away, focused on their activity, "
+    "completely unaware of being filmed "
+    "- QUALITY CONSISTENCY CHECK: NOT a sharp photograph pasted onto the footage - INDISTINGUISHABLE in quality "
+    "from every other element in the scene "
 )
 
 def create_output_folders(base_path):
@@ -143,692 +122,1034 @@ def create_output_folders(base_path):
 
 def extract_background_id(filename):
     """Extract background ID from filename like 'fake_day_bg_001.jpg' -> '001'"""
-    match = re.search(r'fake_(?:day|night)_bg_(\d+)', filename)
-    if match:
-        return match.group(1)
-    return None
-
-def get_diverse_prompt(is_night=False, background_id=None):
-    """Generate a truly diverse prompt for adding synthetic people."""
-    # Use cryptographically secure random for true randomness
-    random.seed(secrets.randbelow(2**32))
-    
-    # Expanded person types with more variety
-    person_types = [
-        # Male variations
-        "young man in casual clothing walking away from camera",
-        "man in jeans and t-shirt walking towards camera",
-        "young man in hoodie and jeans bending down",
-        "man in casual jacket looking down at something",
-        "middle-aged man in business casual walking",
-        "man in shorts and t-shirt walking briskly",
-        "man in jeans and flannel shirt standing still",
-        "man in track pants and hoodie walking away",
-        "man in hoodie with hood up walking stealthily",
-        "man in dark clothing with hood up looking around",
-        "man in hoodie with hood up walking near existing vehicle",
-        "man in dark hoodie with hood up behind existing structure",
-        "man in hoodie with hood up in the distance",
-        "man in dark clothing with hood up walking along edge",
-        "man in hoodie with hood up looking into existing vehicle",
-        "man in dark clothing with hood up walking around existing vehicle",
-        "man in hoodie with hood up standing near a vehicle",
-        "man in dark clothing with hood up walking behind existing structure",
-        "man in hoodie with hood up looking into a garden",
-        "man in dark clothing with hood up walking along existing structure",
-        "man in hoodie with hood up standing behind existing structure",
-        "man in dark clothing with hood up walking in the distance",
-        "man in hoodie with hood up appearing from around a corner",
-        "man in dark clothing with hood up walking along the perimeter",
-        "man in hoodie with hood up standing near a building",
-        "man in dark clothing with hood up walking near existing structure",
-        
-        # Female variations  
-        "young woman in casual clothing walking away from camera",
-        "woman in jeans and sweater walking towards camera",
-        "young woman in hoodie and leggings bending down",
-        "woman in casual jacket looking down at phone",
-        "middle-aged woman in business casual walking",
-        "woman in dress and cardigan walking slowly",
-        "woman in summer dress walking towards camera",
-        "woman in yoga pants and tank top jogging",
-        "woman in business suit walking purposefully",
-        "woman in hoodie with hood up walking stealthily",
-        "woman in dark clothing with hood up looking around",
-        "woman in hoodie with hood up walking near existing vehicle",
-        "woman in dark clothing with hood up behind existing structure",
-        "woman in hoodie with hood up in the distance",
-        "woman in dark clothing with hood up walking along edge",
-        "woman in hoodie with hood up looking into existing vehicle",
-        "woman in dark clothing with hood up walking around existing vehicle",
-        "woman in hoodie with hood up standing near a vehicle",
-        "woman in dark clothing with hood up walking behind existing structure",
-        "woman in hoodie with hood up looking into a garden",
-        "woman in dark clothing with hood up walking along existing structure",
-        "woman in hoodie with hood up standing behind existing structure",
-        "woman in dark clothing with hood up walking in the distance",
-        "woman in hoodie with hood up appearing from around a corner",
-        "woman in dark clothing with hood up walking along the perimeter",
-        "woman in hoodie with hood up standing near a building",
-        "woman in dark clothing with hood up walking near existing structure",
-        
-        # Group activities (2 people)
-        "two people walking together - one man and one woman",
-        "two friends walking side by side",
-        "two people walking with hoodies up",
-        "two people in dark clothing walking together",
-        "two people walking near existing vehicle",
-        "two people walking behind existing structure",
-        "two people walking in the distance",
-        "two people walking along the edge of the frame",
-        "two people walking around a vehicle",
-        "two people walking along existing structure",
-        "two people walking near a building",
-        "two people walking along the perimeter",
-        "two people appearing from around a corner",
-        "two people walking near existing structure",
-        "two people walking along the side of the scene",
-        "two people walking near the border",
-        "two people walking in the background",
-        "two people walking in the foreground near edge",
-        "two people walking diagonally across the scene",
-        
-        # Generic person descriptions for maximum variety
-        "person in casual clothing walking naturally",
-        "person in everyday attire moving through the scene",
-        "person in dark clothing walking along the edge",
-        "person looking at their phone while walking",
-        "two teenagers walking together",
-        "person riding a bicycle through the scene",
-        "person walking with headphones on",
-        "person sitting on a bench or ledge",
-        "person looking into existing vehicle window",
-        "person walking around existing vehicle",
-        "person standing behind existing structure looking into garden",
-        "person walking along existing structure",
-        "person in the distance walking slowly",
-        "person appearing from behind a building",
-        "person walking along existing structure",
-        "person standing near a vehicle",
-        "person walking near a gate or entrance",
-        "person walking along a pathway",
-        "person walking near existing structure",
-        "person walking near a garden area",
-        "person walking near a driveway",
-        "person walking near a walkway",
-        "person walking near a patio area",
-        "person walking near a deck or porch",
-        "person walking near a garage",
-        "person walking near existing structure",
-        "person walking near existing vegetation",
-        "person walking near a mailbox",
-        "person walking near a street sign",
-        "person walking near a lamppost",
-        "person walking near a trash can",
-        "person walking near a recycling bin",
-        "person walking near a flower bed",
-        "person walking near existing vegetation",
-        "person walking near existing structure",
-        "person walking near existing structure",
-        "person walking near a corner of a building",
-        "person walking near a side entrance",
-        "person walking near a back entrance",
-        "person walking near a front entrance",
-        "person walking near a side door",
-        "person walking near a back door",
-        "person walking near a front door",
-        "person walking near a window",
-        "person walking near a side window",
-        "person walking near a back window",
-        "person walking near a front window"
-    ]
+    match = _BG_ID_RE.search(filename)
+    return match.group(1) if match else None
+
+# Fixed instructions per mode, joined once at import rather than per request
+_FIXED_PROMPTS = {
+    False: base_prompt,
+    True: f"{base_prompt}\n\n{night_quality_prompt}",
+}
+
+def get_fixed_prompt(is_night=False):
+    """Instructions shared by every request of a mode (day/night); sent once as a cached system instruction."""
+    return _FIXED_PROMPTS[bool(is_night)]
+
+# Prompt fragments for get_diverse_prompt, built once at import
+# Expanded person types with more variety
+_PERSON_TYPES = (
+    # Male variations
+    "young man in casual clothing walking away from camera",
+    "man in jeans and t-shirt walking towards camera",
+    "young man in hoodie and jeans bending down",
+    "man in casual jacket looking down at something",
+    "middle-aged man in business casual walking",
+    "man in shorts and t-shirt walking briskly",
+    "man in jeans and flannel shirt standing still",
+    "man in track pants and hoodie walking away",
+    "man in hoodie with hood up walking stealthily",
+    "man in dark clothing with hood up looking around",
+    "man in hoodie with hood up walking near existing vehicle",
+    "man in dark hoodie with hood up behind existing structure",
+    "man in hoodie with hood up in the distance",
+    "man in dark clothing with hood up walking along edge",
+    "man in hoodie with hood up looking into existing vehicle",
+    "man in dark clothing with hood up walking around existing vehicle",
+    "man in hoodie with hood up standing near a vehicle",
+    "man in dark clothing with hood up walking behind existing structure",
+    "man in hoodie with hood up looking into a garden",
+    "man in dark clothing with hood up walking along existing structure",
+    "man in hoodie with hood up standing behind existing structure",
+    "man in dark clothing with hood up walking in the distance",
+    "man in hoodie with hood up appearing from around a corner",
+    "man in dark clothing with hood up walking along the perimeter",
+    "man in hoodie with hood up standing near a building",
+    "man in dark clothing with hood up walking near existing structure",
     
-    selected_person = secrets.choice(person_types)
+    # Female variations  
+    "young woman in casual clothing walking away from camera",
+    "woman in jeans and sweater walking towards camera",
+    "young woman in hoodie and leggings bending down",
+    "woman in casual jacket looking down at phone",
+    "middle-aged woman in business casual walking",
+    "woman in dress and cardigan walking slowly",
+    "woman in summer dress walking towards camera",
+    "woman in yoga pants and tank top jogging",
+    "woman in business suit walking purposefully",
+    "woman in hoodie with hood up walking stealthily",
+    "woman in dark clothing with hood up looking around",
+    "woman in hoodie with hood up walking near existing vehicle",
+    "woman in dark clothing with hood up behind existing structure",
+    "woman in hoodie with hood up in the distance",
+    "woman in dark clothing with hood up walking along edge",
+    "woman in hoodie with hood up looking into existing vehicle",
+    "woman in dark clothing with hood up walking around existing vehicle",
+    "woman in hoodie with hood up standing near a vehicle",
+    "woman in dark clothing with hood up walking behind existing structure",
+    "woman in hoodie with hood up looking into a garden",
+    "woman in dark clothing with hood up walking along existing structure",
+    "woman in hoodie with hood up standing behind existing structure",
+    "woman in dark clothing with hood up walking in the distance",
+    "woman in hoodie with hood up appearing from around a corner",
+    "woman in dark clothing with hood up walking along the perimeter",
+    "woman in hoodie with hood up standing near a building",
+    "woman in dark clothing with hood up walking near existing structure",
     
-    # Clothing colors
-    if is_night:
-        clothing_colors = ["dark", "black", "gray", "very dark", "charcoal", "dark gray"]
-    else:
-        clothing_colors = ["dark", "black", "gray", "blue", "green", "red", "white", "navy", "brown", "tan", "beige"]
-    
-    clothing_items = ["hoodie", "jacket", "sweater", "t-shirt", "shirt", "dress", "pants", "jeans", "shorts", "coat"]
-    
-    random_color = secrets.choice(clothing_colors)
-    random_item = secrets.choice(clothing_items)
-    
-    # Random activity locations - MASSIVELY EXPANDED for maximum variety
-    # 10% FOREGROUND, 30% MID-GROUND, 60% BACKGROUND
-    location_options = [
-        # FOREGROUND (10% - rare, edge positioning only)
-        "in the FOREGROUND partially cut off by left edge - person should be LARGE (40-60% of frame height)",
-        "in the FOREGROUND partially cut off by right edge - person should be LARGE (40-60% of frame height)",
-        "in the FOREGROUND at the bottom left corner partially visible - person should be LARGE (40-60% of frame height)",
-        "in the FOREGROUND at the bottom right corner partially visible - person should be LARGE (40-60% of frame height)",
-        "in the FOREGROUND walking along the very left edge - person should be LARGE (40-60% of frame height)",
-        "in the FOREGROUND walking along the very right edge - person should be LARGE (40-60% of frame height)",
-        
-        # MID-GROUND (30% - medium person, varied edge positions)
-        "in the MID-GROUND walking along the left edge of frame - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking along the right edge of frame - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND partially cut off by left edge - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND partially cut off by right edge - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND moving through left third of frame - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND moving through right third of frame - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND at the left perimeter - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND at the right perimeter - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND emerging from left side - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND emerging from right side - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking past on left side - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking past on right side - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND at left corner area - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND at right corner area - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND along left boundary - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND along right boundary - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND passing through left zone - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND passing through right zone - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND at left margin - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND at right margin - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND moving along left perimeter - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND moving along right perimeter - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND half cut off by left frame edge - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND half cut off by right frame edge - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking near left border - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking near right border - person should be MEDIUM size (20-30% of frame height)",
-        
-        # MID-GROUND PARTIALLY VISIBLE BEHIND EXISTING OBJECTS (Priority scenarios)
-        "in the MID-GROUND with only HEAD and SHOULDERS visible behind existing object - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND with only UPPER BODY visible behind existing structure - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND with 50% of body hidden behind whatever exists in scene - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND with 60% of body hidden behind existing elements - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND with 70% of body hidden behind existing objects - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND partially obscured by existing structures with only 40% visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND partially obscured by existing elements with only 30% visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking behind existing objects with legs hidden - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking behind existing structures with lower body hidden - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND peeking around existing object with most of body hidden - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND standing behind existing element with only head/torso visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND crouching behind existing structure with only upper body visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND leaning around existing object partially hidden - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND emerging from behind existing structure half visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND ducking behind existing element partially obscured - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND positioned behind existing objects with partial visibility - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND hiding behind existing structure with only portion visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND moving behind existing elements partially hidden - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking behind existing objects on the left partially visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking behind existing objects on the right partially visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND behind existing structure on left with 60% hidden - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND behind existing structure on right with 60% hidden - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND behind existing elements with only top half visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND behind existing objects with only side visible - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND partially blocked by existing structure - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND partially covered by existing elements - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND standing behind existing object showing only 40% of body - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND standing behind existing structure showing only 50% of body - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND walking past existing object with partial occlusion - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND moving behind existing barrier partially hidden - person should be MEDIUM size (20-30% of frame height)",
-        
-        # BACKGROUND (60% - small person, far from camera, maximum variety)
-        "in the BACKGROUND walking in the far distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along a distant path - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking between distant structures - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along a distant boundary - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND appearing as a small figure in the distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking in the far background - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along the far left edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along the far right edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND partially cut off by far left edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND partially cut off by far right edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND emerging from far left edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND emerging from far right edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking through far left area - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking through far right area - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at the far left corner - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at the far right corner - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND moving along distant left perimeter - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND moving along distant right perimeter - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking in far left zone - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking in far right zone - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND as a small figure on left side - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND as a small figure on right side - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along distant left boundary - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along distant right boundary - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND in the far left distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND in the far right distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND moving through far left region - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND moving through far right region - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking near far left edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking near far right edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at distant left margin - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at distant right margin - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking through distant left side - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking through distant right side - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND as tiny figure on far left - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND as tiny figure on far right - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND moving along far left edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND moving along far right edge - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking in distant left area - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking in distant right area - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at far left perimeter - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at far right perimeter - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking behind whatever objects already exist in the scene - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND partially hidden behind existing structures - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking in the neighbor's garden in the distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND in the neighbor's yard on the left - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND in the neighbor's yard on the right - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at the very edge of the house in the distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND behind the house in the far distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND around the side of the house - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND near the back corner of the house - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at the far side of the property - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along the neighbor's driveway - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND in the neighbor's backyard area - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND near the property line in the distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking between houses in the distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND behind existing vegetation - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND partially obscured by existing elements - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking near the far fence line - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at the distant back of the property - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND near the side gate in the distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along the distant edge of the yard - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at the corner of the property line - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking through the distant yard area - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND near the back entrance in the distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking along the far side boundary - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND in the distant side yard area - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND near the far corner of the building - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking through the neighbor's property - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND at the distant edge of the frame - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND behind existing outdoor elements - person should be SMALL (15-25% of frame height)",
-        
-        # BACKGROUND PARTIALLY VISIBLE BEHIND EXISTING OBJECTS
-        "in the BACKGROUND with only head visible behind existing objects in distance - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND with only upper body visible behind distant structures - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND with 70% hidden behind distant existing elements - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND partially obscured by distant existing objects - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking behind distant existing structures with partial visibility - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND peeking from behind distant existing elements - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND emerging from behind distant existing objects - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND standing behind distant existing structure with only portion visible - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND crouching behind distant existing elements partially hidden - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND moving behind distant existing objects with partial occlusion - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND walking past distant existing structures partially obscured - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND behind distant existing objects on left partially visible - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND behind distant existing objects on right partially visible - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND partially blocked by distant existing elements - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND partially covered by distant existing structures - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND with only silhouette visible behind distant objects - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND with only outline visible behind distant structures - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND ducking behind distant existing elements - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND leaning around distant existing objects - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND hiding behind distant existing structures partially visible - person should be SMALL (15-25% of frame height)",
-        
-        # MORE BACKGROUND VARIATIONS - Left side specific
-        "in the BACKGROUND far left walking towards back - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left walking away - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left standing still - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left corner moving slowly - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left edge walking parallel - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left side walking diagonally - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left area crouching - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left zone bending over - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left margin standing - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far left boundary walking slowly - person should be SMALL (15-25% of frame height)",
-        
-        # MORE BACKGROUND VARIATIONS - Right side specific
-        "in the BACKGROUND far right walking towards back - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right walking away - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right standing still - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right corner moving slowly - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right edge walking parallel - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right side walking diagonally - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right area crouching - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right zone bending over - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right margin standing - person should be SMALL (15-25% of frame height)",
-        "in the BACKGROUND far right boundary walking slowly - person should be SMALL (15-25% of frame height)",
-        
-        # MORE MID-GROUND LEFT variations
-        "in the MID-GROUND left edge walking fast - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left edge walking slow - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left edge standing - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left edge crouching - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left edge bending - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left side walking towards camera - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left side walking away from camera - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left corner area standing still - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left corner area moving - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND left third walking diagonally - person should be MEDIUM size (20-30% of frame height)",
-        
-        # MORE MID-GROUND RIGHT variations  
-        "in the MID-GROUND right edge walking fast - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right edge walking slow - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right edge standing - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right edge crouching - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right edge bending - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right side walking towards camera - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right side walking away from camera - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right corner area standing still - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right corner area moving - person should be MEDIUM size (20-30% of frame height)",
-        "in the MID-GROUND right third walking diagonally - person should be MEDIUM size (20-30% of frame height)",
-        
-        # EXTREME DISTANCE (more variety)
-        "in the EXTREME BACKGROUND as a tiny figure in the far distance - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND walking in the very far distance - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND appearing as a small dot in the distance - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND on the far left as a tiny dot - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND on the far right as a tiny dot - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND walking along the horizon on left - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND walking along the horizon on right - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND barely visible on far left - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND barely visible on far right - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND as a speck in the distance on left - person should be VERY SMALL (10-15% of frame height)",
-        "in the EXTREME BACKGROUND as a speck in the distance on right - person should be VERY SMALL (10-15% of frame height)"
-    ]
+    # Group activities (2 people)
+    "two people walking together - one man and one woman",
+    "two friends walking side by side",
+    "two people walking with hoodies up",
+    "two people in dark clothing walking together",
+    "two people walking near existing vehicle",
+    "two people walking behind existing structure",
+    "two people walking in the distance",
+    "two people walking along the edge of the frame",
+    "two people walking around a vehicle",
+    "two people walking along existing structure",
+    "two people walking near a building",
+    "two people walking along the perimeter",
+    "two people appearing from around a corner",
+    "two people walking near existing structure",
+    "two people walking along the side of the scene",
+    "two people walking near the border",
+    "two people walking in the background",
+    "two people walking in the foreground near edge",
+    "two people walking diagonally across the scene",
     
-    # Activity options with 70% NORMAL / 30% SUSPICIOUS split
-    # NORMAL ACTIVITIES (70% of generations) - MASSIVELY EXPANDED for maximum variety
-    normal_activities = [
-        # Walking variations - different speeds, directions, postures
-        "walking naturally and casually while looking down or away",
-        "walking quickly with purpose while looking at the ground", 
-        "walking slowly while looking around at the environment",
-        "walking with their hands in pockets, head down",
-        "walking with arms swinging naturally, looking ahead",
-        "walking with their head tilted down in thought",
-        "walking while looking at the ground",
-        "walking while looking at their feet",
-        "walking briskly with confident stride",
-        "walking leisurely with relaxed posture",
-        "walking hesitantly while looking around",
-        "walking determinedly while looking straight ahead",
-        "strolling casually with hands at sides",
-        "striding purposefully while looking down",
-        "ambling slowly while glancing around",
-        "marching quickly while looking forward",
-        "wandering aimlessly while looking at surroundings",
-        "pacing steadily while head is down",
-        "stepping carefully while watching ground",
-        "moving briskly while arms swing",
-        
-        # Different poses and body positions
-        "standing still while looking at phone",
-        "standing with arms crossed looking away",
-        "standing with one hand on hip looking down",
-        "standing casually with weight on one leg",
-        "leaning against something while looking at phone",
-        "bending down to pick something up",
-        "crouching down while looking at ground",
-        "kneeling while doing something",
-        "sitting on steps while looking at phone",
-        "sitting casually while waiting",
-        "stretching arms while standing",
-        "adjusting clothing while walking",
-        "tying shoe while bent over",
-        "checking watch while standing",
-        "looking up at sky briefly",
-        "shielding eyes from sun",
-        "wiping face with hand",
-        "scratching head while thinking",
-        
-        # Carrying/holding different items
-        "walking with shopping bags while looking down",
-        "carrying packages while looking at ground",
-        "carrying groceries while looking at ground",
-        "carrying laundry while looking at ground",
-        "carrying boxes while looking at ground",
-        "carrying tools while looking at ground",
-        "carrying backpack while walking",
-        "carrying briefcase while walking",
-        "carrying purse while walking",
-        "holding umbrella while walking",
-        "carrying sports equipment while walking",
-        "holding coffee cup while walking",
-        "carrying bag over shoulder while walking",
-        
-        # Phone/device usage
-        "talking on phone while walking and looking away",
-        "texting on phone while walking slowly",
-        "looking at phone while standing still",
-        "scrolling on phone while walking",
-        "holding phone to ear while standing",
-        "checking phone while paused",
-        
-        # Normal residential activities
-        "getting mail while looking at mailbox",
-        "walking dog on leash while looking at ground",
-        "taking out trash while looking at trash can",
-        "arriving home while looking at keys",
-        "doing yard work while looking at plants",
-        "chatting with neighbor while looking at them",
-        "unlocking car while looking at car door",
-        "checking plants while looking at garden",
-        "walking to mailbox while looking ahead",
-        "walking to front door while looking at keys",
-        "checking mail while looking at letters",
-        "walking to car while looking at ground",
-        "putting away trash cans while looking at ground",
-        "opening gate while looking at latch",
-        "closing gate while looking at handle",
-        "watering plants while looking at garden",
-        "sweeping pathway while looking at ground",
-        "raking leaves while looking at ground",
-        "trimming plants while bent over",
-        "picking up items from ground",
-        
-        # Different directional movements
-        "walking diagonally across the scene",
-        "walking parallel to the camera view",
-        "walking perpendicular to camera",
-        "walking towards the camera angle",
-        "walking away from the camera angle",
-        "walking from left to right across frame",
-        "walking from right to left across frame",
-        "circling around an area",
-        "pacing back and forth",
-        "turning around while walking",
-        "changing direction mid-walk",
-        "pausing mid-stride then continuing",
-        
-        # Interacting with environment
-        "opening door while looking at handle",
-        "closing door while looking at door",
-        "stepping over something carefully",
-        "walking up steps while watching feet",
-        "walking down steps while watching feet",
-        "stepping onto pathway",
-        "stepping off curb carefully",
-        "navigating around obstacles",
-        "sidestepping around something",
-        "backing up slowly"
-    ]
+    # Generic person descriptions for maximum variety
+    "person in casual clothing walking naturally",
+    "person in everyday attire moving through the scene",
+    "person in dark clothing walking along the edge",
+    "person looking at their phone while walking",
+    "two teenagers walking together",
+    "person riding a bicycle through the scene",
+    "person walking with headphones on",
+    "person sitting on a bench or ledge",
+    "person looking into existing vehicle window",
+    "person walking around existing vehicle",
+    "person standing behind existing structure looking into garden",
+    "person walking along existing structure",
+    "person in the distance walking slowly",
+    "person appearing from behind a building",
+    "person walking along existing structure",
+    "person standing near a vehicle",
+    "person walking near a gate or entrance",
+    "person walking along a pathway",
+    "person walking near existing structure",
+    "person walking near a garden area",
+    "person walking near a driveway",
+    "person walking near a walkway",
+    "person walking near a patio area",
+    "person walking near a deck or porch",
+    "person walking near a garage",
+    "person walking near existing structure",
+    "person walking near existing vegetation",
+    "person walking near a mailbox",
+    "person walking near a street sign",
+    "person walking near a lamppost",
+    "person walking near a trash can",
+    "person walking near a recycling bin",
+    "person walking near a flower bed",
+    "person walking near existing vegetation",
+    "person walking near existing structure",
+    "person walking near existing structure",
+    "person walking near a corner of a building",
+    "person walking near a side entrance",
+    "person walking near a back entrance",
+    "person walking near a front entrance",
+    "person walking near a side door",
+    "person walking near a back door",
+    "person walking near a front door",
+    "person walking near a window",
+    "person walking near a side window",
+    "person walking near a back window",
+    "person walking near a front window"
+)
+
+# Clothing colors
+_CLOTHING_COLORS_DAY = ("dark", "black", "gray", "blue", "green", "red", "white", "navy", "brown", "tan", "beige")
+_CLOTHING_COLORS_NIGHT = ("dark", "black", "gray", "very dark", "charcoal", "dark gray")
+_CLOTHING_ITEMS = ("hoodie", "jacket", "sweater", "t-shirt", "shirt", "dress", "pants", "jeans", "shorts", "coat")
+
+# Size each distance zone implies, appended to the chosen location when the prompt is built
+_ZONE_SIZES = {
+    "FOREGROUND": "LARGE (40-60% of frame height)",
+    "MID-GROUND": "MEDIUM size (20-30% of frame height)",
+    "BACKGROUND": "SMALL (15-25% of frame height)",
+    "EXTREME BACKGROUND": "VERY SMALL (10-15% of frame height)",
+}
+
+# Random activity locations as (zone, placement) pairs - MASSIVELY EXPANDED for maximum variety
+# 10% FOREGROUND, 30% MID-GROUND, 60% BACKGROUND
+_LOCATION_OPTIONS = (
+    # FOREGROUND (10% - rare, edge positioning only)
+    ("FOREGROUND", "partially cut off by left edge"),
+    ("FOREGROUND", "partially cut off by right edge"),
+    ("FOREGROUND", "at the bottom left corner partially visible"),
+    ("FOREGROUND", "at the bottom right corner partially visible"),
+    ("FOREGROUND", "walking along the very left edge"),
+    ("FOREGROUND", "walking along the very right edge"),
     
-    # SUSPICIOUS ACTIVITIES (30% of generations)
-    suspicious_activities = [
-        # Suspicious behaviors
-        "walking slowly while constantly looking around nervously",
-        "stopping frequently to look behind them",
-        "trying to stay in shadows or out of sight",
-        "repeatedly approaching then retreating from door/window",
-        "looking up at cameras or security features",
-        "testing door handles or locks",
-        "peering into windows from close distance",
-        "loitering without clear purpose",
-        "pacing in small area repeatedly",
-        "crouching by doors or windows",
-        "moving with exaggerated stealth",
-        "obscuring face while moving",
-        "examining security features",
-        "carrying tools inappropriately (bolt cutters, crowbar)",
-        "walking stealthily while looking around nervously",
-        "moving slowly and cautiously while checking surroundings",
-        "walking while constantly looking over their shoulder",
-        "moving furtively while looking in all directions",
-        "walking while trying to stay in shadows or out of view",
-        "moving quietly while keeping their head down",
-        "walking while appearing to hide their face",
-        "moving suspiciously while looking around for cameras",
-        "walking while appearing to case the area",
-        "moving while looking like they don't belong there",
-        "walking while appearing to be avoiding detection",
-        "moving while looking like they're up to something",
-        "walking while appearing nervous or jumpy",
-        "moving while looking like they're trying to be unnoticed",
-        "walking while appearing to scope out the area",
-        "walking stealthily near existing vehicle while looking around",
-        "moving cautiously behind existing structure while checking surroundings",
-        "walking suspiciously in the distance while looking around",
-        "moving furtively near a vehicle while looking over shoulder",
-        "walking stealthily along existing structure while looking around",
-        "moving cautiously near existing vehicle while looking around nervously",
-        "walking suspiciously behind existing structure while looking around",
-        "moving furtively in the distance while looking around",
-        "walking stealthily near a building while looking around",
-        "moving cautiously along existing structure while looking around",
-        "walking suspiciously near existing structure while looking around",
-        "moving furtively near a door while looking around",
-        "walking stealthily near a window while looking around",
-        "moving cautiously near a driveway while looking around",
-        "walking suspiciously near a walkway while looking around"
-    ]
+    # MID-GROUND (30% - medium person, varied edge positions)
+    ("MID-GROUND", "walking along the left edge of frame"),
+    ("MID-GROUND", "walking along the right edge of frame"),
+    ("MID-GROUND", "partially cut off by left edge"),
+    ("MID-GROUND", "partially cut off by right edge"),
+    ("MID-GROUND", "moving through left third of frame"),
+    ("MID-GROUND", "moving through right third of frame"),
+    ("MID-GROUND", "at the left perimeter"),
+    ("MID-GROUND", "at the right perimeter"),
+    ("MID-GROUND", "emerging from left side"),
+    ("MID-GROUND", "emerging from right side"),
+    ("MID-GROUND", "walking past on left side"),
+    ("MID-GROUND", "walking past on right side"),
+    ("MID-GROUND", "at left corner area"),
+    ("MID-GROUND", "at right corner area"),
+    ("MID-GROUND", "along left boundary"),
+    ("MID-GROUND", "along right boundary"),
+    ("MID-GROUND", "passing through left zone"),
+    ("MID-GROUND", "passing through right zone"),
+    ("MID-GROUND", "at left margin"),
+    ("MID-GROUND", "at right margin"),
+    ("MID-GROUND", "moving along left perimeter"),
+    ("MID-GROUND", "moving along right perimeter"),
+    ("MID-GROUND", "half cut off by left frame edge"),
+    ("MID-GROUND", "half cut off by right frame edge"),
+    ("MID-GROUND", "walking near left border"),
+    ("MID-GROUND", "walking near right border"),
     
-    # Select activity type based on 70/30 split
-    if secrets.randbelow(100) < 70:  # 70% normal
-        activity_options = normal_activities
-    else:  # 30% suspicious
-        activity_options = suspicious_activities
-    
-    # Build the full prompt with maximum variety
-    full_prompt = base_prompt + f"- {selected_person} "
-    full_prompt += f"- wearing a {random_color} {random_item} "
-    full_prompt += f"- positioned {secrets.choice(location_options)} "
-    full_prompt += f"- {secrets.choice(activity_options)} "
-    
-    # Add random environmental context
-    context_options = [
-        "Choose clothing and activities that are contextually appropriate for the specific environment shown",
-        "Ensure the person looks like they naturally belong in this specific surveillance scene",
-        "Make sure the person's clothing and behavior match the time of day and setting",
-        "The person should appear as if they were originally captured in this exact location"
-    ]
+    # MID-GROUND PARTIALLY VISIBLE BEHIND EXISTING OBJECTS (Priority scenarios)
+    ("MID-GROUND", "with only HEAD and SHOULDERS visible behind existing object"),
+    ("MID-GROUND", "with only UPPER BODY visible behind existing structure"),
+    ("MID-GROUND", "with 50% of body hidden behind whatever exists in scene"),
+    ("MID-GROUND", "with 60% of body hidden behind existing elements"),
+    ("MID-GROUND", "with 70% of body hidden behind existing objects"),
+    ("MID-GROUND", "partially obscured by existing structures with only 40% visible"),
+    ("MID-GROUND", "partially obscured by existing elements with only 30% visible"),
+    ("MID-GROUND", "walking behind existing objects with legs hidden"),
+    ("MID-GROUND", "walking behind existing structures with lower body hidden"),
+    ("MID-GROUND", "peeking around existing object with most of body hidden"),
+    ("MID-GROUND", "standing behind existing element with only head/torso visible"),
+    ("MID-GROUND", "crouching behind existing structure with only upper body visible"),
+    ("MID-GROUND", "leaning around existing object partially hidden"),
+    ("MID-GROUND", "emerging from behind existing structure half visible"),
+    ("MID-GROUND", "ducking behind existing element partially obscured"),
+    ("MID-GROUND", "positioned behind existing objects with partial visibility"),
+    ("MID-GROUND", "hiding behind existing structure with only portion visible"),
+    ("MID-GROUND", "moving behind existing elements partially hidden"),
+    ("MID-GROUND", "walking behind existing objects on the left partially visible"),
+    ("MID-GROUND", "walking behind existing objects on the right partially visible"),
+    ("MID-GROUND", "behind existing structure on left with 60% hidden"),
+    ("MID-GROUND", "behind existing structure on right with 60% hidden"),
+    ("MID-GROUND", "behind existing elements with only top half visible"),
+    ("MID-GROUND", "behind existing objects with only side visible"),
+    ("MID-GROUND", "partially blocked by existing structure"),
+    ("MID-GROUND", "partially covered by existing elements"),
+    ("MID-GROUND", "standing behind existing object showing only 40% of body"),
+    ("MID-GROUND", "standing behind existing structure showing only 50% of body"),
+    ("MID-GROUND", "walking past existing object with partial occlusion"),
+    ("MID-GROUND", "moving behind existing barrier partially hidden"),
+    
+    # BACKGROUND (60% - small person, far from camera, maximum variety)
+    ("BACKGROUND", "walking in the far distance"),
+    ("BACKGROUND", "walking along a distant path"),
+    ("BACKGROUND", "walking between distant structures"),
+    ("BACKGROUND", "walking along a distant boundary"),
+    ("BACKGROUND", "appearing as a small figure in the distance"),
+    ("BACKGROUND", "walking in the far background"),
+    ("BACKGROUND", "walking along the far left edge"),
+    ("BACKGROUND", "walking along the far right edge"),
+    ("BACKGROUND", "partially cut off by far left edge"),
+    ("BACKGROUND", "partially cut off by far right edge"),
+    ("BACKGROUND", "emerging from far left edge"),
+    ("BACKGROUND", "emerging from far right edge"),
+    ("BACKGROUND", "walking through far left area"),
+    ("BACKGROUND", "walking through far right area"),
+    ("BACKGROUND", "at the far left corner"),
+    ("BACKGROUND", "at the far right corner"),
+    ("BACKGROUND", "moving along distant left perimeter"),
+    ("BACKGROUND", "moving along distant right perimeter"),
+    ("BACKGROUND", "walking in far left zone"),
+    ("BACKGROUND", "walking in far right zone"),
+    ("BACKGROUND", "as a small figure on left side"),
+    ("BACKGROUND", "as a small figure on right side"),
+    ("BACKGROUND", "walking along distant left boundary"),
+    ("BACKGROUND", "walking along distant right boundary"),
+    ("BACKGROUND", "in the far left distance"),
+    ("BACKGROUND", "in the far right distance"),
+    ("BACKGROUND", "moving through far left region"),
+    ("BACKGROUND", "moving through far right region"),
+    ("BACKGROUND", "walking near far left edge"),
+    ("BACKGROUND", "walking near far right edge"),
+    ("BACKGROUND", "at distant left margin"),
+    ("BACKGROUND", "at distant right margin"),
+    ("BACKGROUND", "walking through distant left side"),
+    ("BACKGROUND", "walking through distant right side"),
+    ("BACKGROUND", "as tiny figure on far left"),
+    ("BACKGROUND", "as tiny figure on far right"),
+    ("BACKGROUND", "moving along far left edge"),
+    ("BACKGROUND", "moving along far right edge"),
+    ("BACKGROUND", "walking in distant left area"),
+    ("BACKGROUND", "walking in distant right area"),
+    ("BACKGROUND", "at far left perimeter"),
+    ("BACKGROUND", "at far right perimeter"),
+    ("BACKGROUND", "walking behind whatever objects already exist in the scene"),
+    ("BACKGROUND", "partially hidden behind existing structures"),
+    ("BACKGROUND", "walking in the neighbor's garden in the distance"),
+    ("BACKGROUND", "in the neighbor's yard on the left"),
+    ("BACKGROUND", "in the neighbor's yard on the right"),
+    ("BACKGROUND", "at the very edge of the house in the distance"),
+    ("BACKGROUND", "behind the house in the far distance"),
+    ("BACKGROUND", "around the side of the house"),
+    ("BACKGROUND", "near the back corner of the house"),
+    ("BACKGROUND", "at the far side of the property"),
+    ("BACKGROUND", "walking along the neighbor's driveway"),
+    ("BACKGROUND", "in the neighbor's backyard area"),
+    ("BACKGROUND", "near the property line in the distance"),
+    ("BACKGROUND", "walking between houses in the distance"),
+    ("BACKGROUND", "behind existing vegetation"),
+    ("BACKGROUND", "partially obscured by existing elements"),
+    ("BACKGROUND", "walking near the far fence line"),
+    ("BACKGROUND", "at the distant back of the property"),
+    ("BACKGROUND", "near the side gate in the distance"),
+    ("BACKGROUND", "walking along the distant edge of the yard"),
+    ("BACKGROUND", "at the corner of the property line"),
+    ("BACKGROUND", "walking through the distant yard area"),
+    ("BACKGROUND", "near the back entrance in the distance"),
+    ("BACKGROUND", "walking along the far side boundary"),
+    ("BACKGROUND", "in the distant side yard area"),
+    ("BACKGROUND", "near the far corner of the building"),
+    ("BACKGROUND", "walking through the neighbor's property"),
+    ("BACKGROUND", "at the distant edge of the frame"),
+    ("BACKGROUND", "behind existing outdoor elements"),
+    
+    # BACKGROUND PARTIALLY VISIBLE BEHIND EXISTING OBJECTS
+    ("BACKGROUND", "with only head visible behind existing objects in distance"),
+    ("BACKGROUND", "with only upper body visible behind distant structures"),
+    ("BACKGROUND", "with 70% hidden behind distant existing elements"),
+    ("BACKGROUND", "partially obscured by distant existing objects"),
+    ("BACKGROUND", "walking behind distant existing structures with partial visibility"),
+    ("BACKGROUND", "peeking from behind distant existing elements"),
+    ("BACKGROUND", "emerging from behind distant existing objects"),
+    ("BACKGROUND", "standing behind distant existing structure with only portion visible"),
+    ("BACKGROUND", "crouching behind distant existing elements partially hidden"),
+    ("BACKGROUND", "moving behind distant existing objects with partial occlusion"),
+    ("BACKGROUND", "walking past distant existing structures partially obscured"),
+    ("BACKGROUND", "behind distant existing objects on left partially visible"),
+    ("BACKGROUND", "behind distant existing objects on right partially visible"),
+    ("BACKGROUND", "partially blocked by distant existing elements"),
+    ("BACKGROUND", "partially covered by distant existing structures"),
+    ("BACKGROUND", "with only silhouette visible behind distant objects"),
+    ("BACKGROUND", "with only outline visible behind distant structures"),
+    ("BACKGROUND", "ducking behind distant existing elements"),
+    ("BACKGROUND", "leaning around distant existing objects"),
+    ("BACKGROUND", "hiding behind distant existing structures partially visible"),
+    
+    # MORE BACKGROUND VARIATIONS - Left side specific
+    ("BACKGROUND", "far left walking towards back"),
+    ("BACKGROUND", "far left walking away"),
+    ("BACKGROUND", "far left standing still"),
+    ("BACKGROUND", "far left corner moving slowly"),
+    ("BACKGROUND", "far left edge walking parallel"),
+    ("BACKGROUND", "far left side walking diagonally"),
+    ("BACKGROUND", "far left area crouching"),
+    ("BACKGROUND", "far left zone bending over"),
+    ("BACKGROUND", "far left margin standing"),
+    ("BACKGROUND", "far left boundary walking slowly"),
+    
+    # MORE BACKGROUND VARIATIONS - Right side specific
+    ("BACKGROUND", "far right walking towards back"),
+    ("BACKGROUND", "far right walking away"),
+    ("BACKGROUND", "far right standing still"),
+    ("BACKGROUND", "far right corner moving slowly"),
+    ("BACKGROUND", "far right edge walking parallel"),
+    ("BACKGROUND", "far right side walking diagonally"),
+    ("BACKGROUND", "far right area crouching"),
+    ("BACKGROUND", "far right zone bending over"),
+    ("BACKGROUND", "far right margin standing"),
+    ("BACKGROUND", "far right boundary walking slowly"),
+    
+    # MORE MID-GROUND LEFT variations
+    ("MID-GROUND", "left edge walking fast"),
+    ("MID-GROUND", "left edge walking slow"),
+    ("MID-GROUND", "left edge standing"),
+    ("MID-GROUND", "left edge crouching"),
+    ("MID-GROUND", "left edge bending"),
+    ("MID-GROUND", "left side walking towards camera"),
+    ("MID-GROUND", "left side walking away from camera"),
+    ("MID-GROUND", "left corner area standing still"),
+    ("MID-GROUND", "left corner area moving"),
+    ("MID-GROUND", "left third walking diagonally"),
+    
+    # MORE MID-GROUND RIGHT variations  
+    ("MID-GROUND", "right edge walking fast"),
+    ("MID-GROUND", "right edge walking slow"),
+    ("MID-GROUND", "right edge standing"),
+    ("MID-GROUND", "right edge crouching"),
+    ("MID-GROUND", "right edge bending"),
+    ("MID-GROUND", "right side walking towards camera"),
+    ("MID-GROUND", "right side walking away from camera"),
+    ("MID-GROUND", "right corner area standing still"),
+    ("MID-GROUND", "right corner area moving"),
+    ("MID-GROUND", "right third walking diagonally"),
+    
+    # EXTREME DISTANCE (more variety)
+    ("EXTREME BACKGROUND", "as a tiny figure in the far distance"),
+    ("EXTREME BACKGROUND", "walking in the very far distance"),
+    ("EXTREME BACKGROUND", "appearing as a small dot in the distance"),
+    ("EXTREME BACKGROUND", "on the far left as a tiny dot"),
+    ("EXTREME BACKGROUND", "on the far right as a tiny dot"),
+    ("EXTREME BACKGROUND", "walking along the horizon on left"),
+    ("EXTREME BACKGROUND", "walking along the horizon on right"),
+    ("EXTREME BACKGROUND", "barely visible on far left"),
+    ("EXTREME BACKGROUND", "barely visible on far right"),
+    ("EXTREME BACKGROUND", "as a speck in the distance on left"),
+    ("EXTREME BACKGROUND", "as a speck in the distance on right"),
+)
+
+# Activity options with 70% NORMAL / 30% SUSPICIOUS split
+# NORMAL ACTIVITIES (70% of generations) - MASSIVELY EXPANDED for maximum variety
+_NORMAL_ACTIVITIES = (
+    # Walking variations - different speeds, directions, postures
+    "walking naturally and casually while looking down or away",
+    "walking quickly with purpose while looking at the ground", 
+    "walking slowly while looking around at the environment",
+    "walking with their hands in pockets, head down",
+    "walking with arms swinging naturally, looking ahead",
+    "walking with their head tilted down in thought",
+    "walking while looking at the ground",
+    "walking while looking at their feet",
+    "walking briskly with confident stride",
+    "walking leisurely with relaxed posture",
+    "walking hesitantly while looking around",
+    "walking determinedly while looking straight ahead",
+    "strolling casually with hands at sides",
+    "striding purposefully while looking down",
+    "ambling slowly while glancing around",
+    "marching quickly while looking forward",
+    "wandering aimlessly while looking at surroundings",
+    "pacing steadily while head is down",
+    "stepping carefully while watching ground",
+    "moving briskly while arms swing",
+    
+    # Different poses and body positions
+    "standing still while looking at phone",
+    "standing with arms crossed looking away",
+    "standing with one hand on hip looking down",
+    "standing casually with weight on one leg",
+    "leaning against something while looking at phone",
+    "bending down to pick something up",
+    "crouching down while looking at ground",
+    "kneeling while doing something",
+    "sitting on steps while looking at phone",
+    "sitting casually while waiting",
+    "stretching arms while standing",
+    "adjusting clothing while walking",
+    "tying shoe while bent over",
+    "checking watch while standing",
+    "looking up at sky briefly",
+    "shielding eyes from sun",
+    "wiping face with hand",
+    "scratching head while thinking",
+    
+    # Carrying/holding different items
+    "walking with shopping bags while looking down",
+    "carrying packages while looking at ground",
+    "carrying groceries while looking at ground",
+    "carrying laundry while looking at ground",
+    "carrying boxes while looking at ground",
+    "carrying tools while looking at ground",
+    "carrying backpack while walking",
+    "carrying briefcase while walking",
+    "carrying purse while walking",
+    "holding umbrella while walking",
+    "carrying sports equipment while walking",
+    "holding coffee cup while walking",
+    "carrying bag over shoulder while walking",
     
-    full_prompt += f"- {secrets.choice(context_options)}"
+    # Phone/device usage
+    "talking on phone while walking and looking away",
+    "texting on phone while walking slowly",
+    "looking at phone while standing still",
+    "scrolling on phone while walking",
+    "holding phone to ear while standing",
+    "checking phone while paused",
     
-    # Add night-specific quality adjustments
-    if is_night:
-        full_prompt += f"\n\n{night_quality_prompt}"
+    # Normal residential activities
+    "getting mail while looking at mailbox",
+    "walking dog on leash while looking at ground",
+    "taking out trash while looking at trash can",
+    "arriving home while looking at keys",
+    "doing yard work while looking at plants",
+    "chatting with neighbor while looking at them",
+    "unlocking car while looking at car door",
+    "checking plants while looking at garden",
+    "walking to mailbox while looking ahead",
+    "walking to front door while looking at keys",
+    "checking mail while looking at letters",
+    "walking to car while looking at ground",
+    "putting away trash cans while looking at ground",
+    "opening gate while looking at latch",
+    "closing gate while looking at handle",
+    "watering plants while looking at garden",
+    "sweeping pathway while looking at ground",
+    "raking leaves while looking at ground",
+    "trimming plants while bent over",
+    "picking up items from ground",
     
-    return full_prompt
+    # Different directional movements
+    "walking diagonally across the scene",
+    "walking parallel to the camera view",
+    "walking perpendicular to camera",
+    "walking towards the camera angle",
+    "walking away from the camera angle",
+    "walking from left to right across frame",
+    "walking from right to left across frame",
+    "circling around an area",
+    "pacing back and forth",
+    "turning around while walking",
+    "changing direction mid-walk",
+    "pausing mid-stride then continuing",
+    
+    # Interacting with environment
+    "opening door while looking at handle",
+    "closing door while looking at door",
+    "stepping over something carefully",
+    "walking up steps while watching feet",
+    "walking down steps while watching feet",
+    "stepping onto pathway",
+    "stepping off curb carefully",
+    "navigating around obstacles",
+    "sidestepping around something",
+    "backing up slowly"
+)
+
+# SUSPICIOUS ACTIVITIES (30% of generations)
+_SUSPICIOUS_ACTIVITIES = (
+    # Suspicious behaviors
+    "walking slowly while constantly looking around nervously",
+    "stopping frequently to look behind them",
+    "trying to stay in shadows or out of sight",
+    "repeatedly approaching then retreating from door/window",
+    "looking up at cameras or security features",
+    "testing door handles or locks",
+    "peering into windows from close distance",
+    "loitering without clear purpose",
+    "pacing in small area repeatedly",
+    "crouching by doors or windows",
+    "moving with exaggerated stealth",
+    "obscuring face while moving",
+    "examining security features",
+    "carrying tools inappropriately (bolt cutters, crowbar)",
+    "walking stealthily while looking around nervously",
+    "moving slowly and cautiously while checking surroundings",
+    "walking while constantly looking over their shoulder",
+    "moving furtively while looking in all directions",
+    "walking while trying to stay in shadows or out of view",
+    "moving quietly while keeping their head down",
+    "walking while appearing to hide their face",
+    "moving suspiciously while looking around for cameras",
+    "walking while appearing to case the area",
+    "moving while looking like they don't belong there",
+    "walking while appearing to be avoiding detection",
+    "moving while looking like they're up to something",
+    "walking while appearing nervous or jumpy",
+    "moving while looking like they're trying to be unnoticed",
+    "walking while appearing to scope out the area",
+    "walking stealthily near existing vehicle while looking around",
+    "moving cautiously behind existing structure while checking surroundings",
+    "walking suspiciously in the distance while looking around",
+    "moving furtively near a vehicle while looking over shoulder",
+    "walking stealthily along existing structure while looking around",
+    "moving cautiously near existing vehicle while looking around nervously",
+    "walking suspiciously behind existing structure while looking around",
+    "moving furtively in the distance while looking around",
+    "walking stealthily near a building while looking around",
+    "moving cautiously along existing structure while looking around",
+    "walking suspiciously near existing structure while looking around",
+    "moving furtively near a door while looking around",
+    "walking stealthily near a window while looking around",
+    "moving cautiously near a driveway while looking around",
+    "walking suspiciously near a walkway while looking around"
+)
+
+# All activities with cumulative weights giving the 70% NORMAL / 30% SUSPICIOUS split in one draw
+_ACTIVITIES = _NORMAL_ACTIVITIES + _SUSPICIOUS_ACTIVITIES
+_ACTIVITY_CUM_WEIGHTS = tuple(itertools.accumulate(
+    [0.7 / len(_NORMAL_ACTIVITIES)] * len(_NORMAL_ACTIVITIES)
+    + [0.3 / len(_SUSPICIOUS_ACTIVITIES)] * len(_SUSPICIOUS_ACTIVITIES)
+))
+
+# Random environmental context
+_CONTEXT_OPTIONS = (
+    "Choose clothing and activities that are contextually appropriate for the specific environment shown",
+    "Ensure the person looks like they naturally belong in this specific surveillance scene",
+    "Make sure the person's clothing and behavior match the time of day and setting",
+    "The person should appear as if they were originally captured in this exact location"
+)
 
-def process_image(image_path, output_path, prefix, background_id, variation_id, is_night=False):
-    """Process a single image by adding a synthetic person."""
+def get_diverse_prompt(is_night=False, background_id=None, rng=_rng):
+    """Generate a truly diverse prompt for adding synthetic people (pass a seeded rng to reproduce one)."""
+    selected_person = rng.choice(_PERSON_TYPES)
+    
+    random_color = rng.choice(_CLOTHING_COLORS_NIGHT if is_night else _CLOTHING_COLORS_DAY)
+    random_item = rng.choice(_CLOTHING_ITEMS)
+    
+    # Select the activity with the 70/30 normal/suspicious split folded into the weights
+    activity = rng.choices(_ACTIVITIES, cum_weights=_ACTIVITY_CUM_WEIGHTS)[0]
+    
+    zone, placement = rng.choice(_LOCATION_OPTIONS)
+    location = f"in the {zone} {placement} - person should be {_ZONE_SIZES[zone]}"
+    context = rng.choice(_CONTEXT_OPTIONS)
+    
+    # Build the varied part of the prompt in one pass (the fixed instructions come from get_fixed_prompt)
+    return (
+        f"- {selected_person} - wearing a {random_color} {random_item} "
+        f"- positioned {location} - {activity} - {context}"
+    )
+
+def configure_logging(buffered=True):
+    """
+    Send this script's log records to stdout as bare messages. When buffered, records are held in a
+    MemoryHandler and written LOG_BUFFER at a time (or as soon as a warning/error arrives), so
+    concurrent requests do not each take the stdout lock. Returns the installed handler.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    if buffered:
+        handler = MemoryHandler(LOG_BUFFER, flushLevel=logging.WARNING, target=handler)
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return handler
+
+def is_retryable(error):
+    """Rate limits (429) and server-side failures (5xx) are worth another attempt."""
+    return isinstance(error, errors.ServerError) or (isinstance(error, errors.APIError) and error.code == 429)
+
+_exponential_backoff = wait_exponential_jitter(initial=BACKOFF_BASE, max=BACKOFF_MAX)
+
+def retry_wait(retry_state):
+    """Seconds to wait before the next attempt: the server's retry-after if present, else jittered exponential."""
+    error = retry_state.outcome.exception()
+    headers = getattr(error.response, "headers", None) or {}
     try:
-        print(f"  Processing {image_path.name} (variation {variation_id})...")
-        
-        # Generate diverse prompt for this image
-        prompt = get_diverse_prompt(is_night=is_night, background_id=background_id)
-        
-        # Load the input background image
-        image = Image.open(image_path)
-        
-        # Generate content using both text prompt and background image
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-image-preview",
-            contents=[prompt, image],
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return _exponential_backoff(retry_state)
+
+def log_retry(retry_state):
+    error = retry_state.outcome.exception()
+    logger.warning(
+        f"    ⏳ {error.code} {error.status}, retrying in {retry_state.upcoming_sleep:.0f}s "
+        f"(attempt {retry_state.attempt_number + 1}/{MAX_ATTEMPTS})"
+    )
+
+@functools.lru_cache(maxsize=64)
+def read_image_part(image_path):
+    """
+    Read the raw file bytes as a Gemini Part (no Pillow decode/re-encode before upload).
+    Cached, since every background is sent once per variation.
+    """
+    mime_type = "image/png" if image_path.suffix.lower() == ".png" else "image/jpeg"
+    return types.Part.from_bytes(data=image_path.read_bytes(), mime_type=mime_type)
+
+class TokenBucket:
+    """
+    Async token bucket: allows `rate` requests per second on average with bursts of up to `capacity`.
+    acquire() only sleeps when the budget is exhausted, instead of pausing after every request.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_MINUTE / 60, capacity=MAX_CONCURRENT):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class BackgroundCaches:
+    """
+    Per-background cached content: the fixed instructions (as system instruction) plus the background
+    image, uploaded once and shared by all of that background's variations so each request only
+    carries the short per-image text. A cache is created by the first job that needs it (later jobs
+    await the same task) and deleted when the background's last job finishes. If caching is
+    unavailable (e.g. below the model's minimum cacheable size) everything is sent inline instead.
+    """
+
+    def __init__(self, client, is_night, job_counts):
+        self.client = client
+        self.is_night = is_night
+        self.enabled = True
+        self._remaining = dict(job_counts)  # background_id -> jobs not finished yet
+        self._caches = {}                   # background_id -> task resolving to the cache name (or None)
+
+    async def acquire(self, background_id, image_path):
+        task = self._caches.get(background_id)
+        if task is None:
+            task = self._caches[background_id] = asyncio.ensure_future(self._create(image_path))
+        return await task
+
+    async def release(self, background_id):
+        self._remaining[background_id] -= 1
+        if self._remaining[background_id] == 0 and background_id in self._caches:
+            await self._delete(await self._caches.pop(background_id))
+
+    async def close(self):
+        """Delete caches left behind by an interrupted run."""
+        for task in self._caches.values():
+            await self._delete(await task)
+        self._caches.clear()
+
+    async def _create(self, image_path):
+        if not self.enabled:
+            return None
+        try:
+            cache = await self.client.caches.create(
+                model=MODEL,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=get_fixed_prompt(self.is_night),
+                    contents=[types.Content(role="user", parts=[read_image_part(image_path)])],
+                    ttl=CACHE_TTL,
+                ),
+            )
+        except Exception as e:
+            # Don't retry for every background once caching has failed
+            self.enabled = False
+            logger.warning(f"⚠️  Context caching unavailable, sending prompt and background per request: {e}")
+            return None
+        return cache.name
+
+    async def _delete(self, cache_name):
+        if cache_name:
+            try:
+                await self.client.caches.delete(name=cache_name)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not delete cache {cache_name}: {e}")
+
+async def generate_with_backoff(client, limiter, contents, cache_name=None, candidate_count=1):
+    """
+    Call Gemini through the async client, retrying rate limits and server errors with backoff.
+    Every attempt (retries included) takes a token from the shared limiter.
+    """
+    config = None
+    if cache_name or candidate_count > 1:
+        config = types.GenerateContentConfig(
+            cached_content=cache_name,
+            candidate_count=candidate_count if candidate_count > 1 else None,
         )
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=retry_wait,
+        retry=retry_if_exception(is_retryable),
+        before_sleep=log_retry,
+        reraise=True,
+    ):
+        with attempt:
+            await limiter.acquire()
+            return await client.models.generate_content(
+                model=MODEL,
+                contents=contents,
+                config=config,
+            )
+
+def com_segment(comment):
+    """A JPEG comment (COM) segment, to be placed after SOI and any leading APP0/APP1 segments."""
+    payload = comment.encode()
+    return b"\xff\xfe" + struct.pack(">H", len(payload) + 2) + payload
+
+def jpeg_header_end(data):
+    """
+    Offset just past SOI and the APP0 (JFIF) / APP1 (Exif) segments that directly follow it; JFIF and
+    Exif require their segment to come first, so a COM segment must be inserted here, not after SOI.
+    """
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF and data[pos + 1] in (0xE0, 0xE1):
+        pos += 2 + struct.unpack_from(">H", data, pos + 2)[0]
+    return min(pos, len(data))
+
+def prompt_digest(prompt):
+    """Short blake2b digest of a prompt, as stored in the per-background .prompts log."""
+    return hashlib.blake2b(prompt.encode(), digest_size=8).hexdigest()
+
+def load_prompt_log(prompt_log):
+    """Digests of the prompts already rendered for one background (empty if it has no log yet)."""
+    try:
+        with open(prompt_log) as f:
+            return set(f.read().split())
+    except FileNotFoundError:
+        return set()
+
+def save_image(data, output_filepath, prompt_seed=None, prompt_log=None, digest=None):
+    """
+    Save a returned image (runs in a worker thread, off the event loop). JPEG responses are written
+    as-is; anything else is decoded and re-encoded as JPEG. prompt_seed is stored in the JPEG
+    comment so the prompt behind each image can be rebuilt; once the image is written, digest is
+    appended to prompt_log so a resumed run does not render the same prompt again.
+    The image goes to a .tmp file that is renamed into place only once complete, so a failed decode
+    never leaves a partial .jpg that resume would count as done.
+    """
+    comment = f"prompt_seed={prompt_seed:08x}" if prompt_seed is not None else ""
+    tmp_filepath = output_filepath.with_suffix(".tmp")
+    try:
+        with open(tmp_filepath, "wb", buffering=WRITE_BUFFER) as f:
+            if data[:2] == b"\xff\xd8":
+                if b"\xff\xd9" not in data[-16:]:
+                    raise ValueError("truncated JPEG (no EOI marker)")
+                # Already JPEG: skip the decode/re-encode round trip (and its generation loss);
+                # the COM segment is spliced in after the JFIF/Exif header without copying the image bytes
+                view = memoryview(data)
+                header_end = jpeg_header_end(data) if comment else 2
+                f.write(view[:header_end])
+                if comment:
+                    f.write(com_segment(comment))
+                f.write(view[header_end:])
+            else:
+                # Close the buffer and the decoded image as soon as the JPEG is written
+                with BytesIO(data) as buffer, Image.open(buffer) as scene_with_person:
+                    scene_with_person.save(
+                        f, "JPEG", quality=JPEG_QUALITY, optimize=False, progressive=False, comment=comment
+                    )
+        os.replace(tmp_filepath, output_filepath)
+        if prompt_log is not None:
+            # One short line per append-mode write, so concurrent savers do not interleave
+            with open(prompt_log, "a") as log:
+                log.write(digest + "\n")
+        logger.info(f"    ✅ Saved: {output_filepath.name}")
+        return True
+    except Exception as e:
+        tmp_filepath.unlink(missing_ok=True)
+        logger.error(f"    ❌ Error saving {output_filepath.name}: {e}")
+        return False
+
+def draw_unique_prompt(is_night, background_id, seen):
+    """
+    Draw a (seed, prompt, digest) triple whose prompt has not been used for this background yet
+    (`seen` is the background's set of used prompt digests, including ones loaded from its .prompts
+    log), so API calls are not spent on identical variations.
+    """
+    for _ in range(MAX_PROMPT_DRAWS):
+        seed = _rng.getrandbits(32)
+        prompt = get_diverse_prompt(is_night=is_night, background_id=background_id, rng=random.Random(seed))
+        digest = prompt_digest(prompt)
+        if digest not in seen:
+            break
+    seen.add(digest)
+    return seed, prompt, digest
+
+def build_batch_prompt(prompts):
+    """Number several per-image descriptions so one request returns one edited image per description."""
+    lines = [
+        f"Return {len(prompts)} separate edited versions of this background, in order, one image per "
+        "numbered description below. Each image follows the placement instructions independently."
+    ]
+    lines += [f"IMAGE {i}: {prompt}" for i, prompt in enumerate(prompts, 1)]
+    return "\n".join(lines)
+
+async def generate_one(client, sem, limiter, caches, seen_prompts, image_path, output_path, prefix, background_id, variation_ids, is_night=False, save_pool=None):
+    """
+    Add a synthetic person to one fake background, once per entry in variation_ids (several
+    variations share one request when VARIATIONS_PER_REQUEST or CANDIDATES_PER_REQUEST > 1; each
+    candidate answers every prompt, so candidates share their prompts' seeds). The background and fixed
+    instructions come from its cached content when `caches` has one; seen_prompts maps background
+    IDs to the digests of the prompts already used for them.
+    At most `sem` requests run at once; the slot is released before the results are saved so the
+    encode overlaps with the next request; saves run on save_pool (main's bounded executor) when
+    given, else the default thread pool.
+    Returns the number of images saved.
+    """
+    try:
+        async with sem:
+            label = f" {variation_ids[0]}" if len(variation_ids) == 1 else f"s {', '.join(map(str, variation_ids))}"
+            logger.info(f"  Processing {image_path.name} (variation{label})...")
+            
+            cache_name = await caches.acquire(background_id, image_path)
+            try:
+                # Generate diverse prompts for this request, skipping ones this background already used
+                # One seed per prompt: get_diverse_prompt(is_night, rng=random.Random(seed)) rebuilds it
+                n_prompts = min(VARIATIONS_PER_REQUEST, len(variation_ids))
+                candidate_count = -(-len(variation_ids) // n_prompts)
+                seeds, prompts, digests = zip(*(
+                    draw_unique_prompt(is_night, background_id, seen_prompts[background_id])
+                    for _ in range(n_prompts)
+                ))
+                prompt = prompts[0] if len(prompts) == 1 else build_batch_prompt(prompts)
+                
+                if cache_name:
+                    # Fixed instructions and background image are already in the cache
+                    contents = [prompt]
+                else:
+                    # Send the full prompt with the background image as raw bytes
+                    contents = [get_fixed_prompt(is_night) + prompt, read_image_part(image_path)]
+                response = await generate_with_backoff(client, limiter, contents, cache_name, candidate_count)
+            finally:
+                await caches.release(background_id)
         
-        # Process the response
-        for part in response.candidates[0].content.parts:
-            if part.inline_data is not None:
-                # Save the generated image with synthetic person
-                # Format: fake_day_synthetic_001_001.jpg (background_id_variation_id)
-                output_filename = f"fake_{prefix}_synthetic_{background_id}_{variation_id:03d}.jpg"
-                output_filepath = output_path / output_filename
-                scene_with_person = Image.open(BytesIO(part.inline_data.data))
-                scene_with_person.save(output_filepath)
-                print(f"    ✅ Saved: {output_filename}")
-                return True
+        # Process the response: returned images (candidate by candidate) map onto variation_ids in order
+        images = [
+            part.inline_data.data
+            for candidate in response.candidates
+            for part in candidate.content.parts
+            if part.inline_data is not None
+        ]
+        if not images:
+            logger.error(f"    ❌ No image data returned for {image_path.name}")
+            return 0
+        if len(images) < len(variation_ids):
+            logger.warning(f"    ⚠️  Only {len(images)}/{len(variation_ids)} images returned for {image_path.name}")
         
-        print(f"    ❌ No image data returned for {image_path.name}")
-        return False
+        saved = 0
+        prompt_log = output_path / f"{background_id}.prompts"
+        for i, (variation_id, data) in enumerate(zip(variation_ids, images)):
+            seed, digest = seeds[i % n_prompts], digests[i % n_prompts]
+            # Save the generated image with synthetic person
+            # Format: fake_day_synthetic_001_001.jpg (background_id_variation_id)
+            output_filename = f"fake_{prefix}_synthetic_{background_id}_{variation_id:03d}.jpg"
+            output_filepath = output_path / output_filename
+            args = (save_image, data, output_filepath, seed, prompt_log, digest)
+            if save_pool is None:
+                saved += await asyncio.to_thread(*args)
+            else:
+                saved += await asyncio.get_running_loop().run_in_executor(save_pool, *args)
+        return saved
         
     except Exception as e:
-        print(f"    ❌ Error processing {image_path.name}: {e}")
-        return False
+        logger.error(f"    ❌ Error processing {image_path.name}: {e}")
+        return 0
+
+def list_backgrounds(input_path):
+    """Sorted fake_*_bg_*.jpg files in input_path; one scandir pass using the cached d_type, no per-file stat."""
+    with os.scandir(input_path) as entries:
+        names = [
+            entry.name for entry in entries
+            if fnmatch.fnmatchcase(entry.name, "fake_*_bg_*.jpg") and entry.is_file()
+        ]
+    return [input_path / name for name in sorted(names)]
+
+def scan_existing_variations(output_path, prefix):
+    """
+    Set of saved (background_id, variation_id) pairs, from one scandir of output_path (enables resume
+    without a glob per background). Workers finish out of order, so an interrupted run can leave gaps
+    below the highest saved ID; resume fills every missing ID rather than continuing from the maximum.
+    """
+    existing = set()
+    with os.scandir(output_path) as entries:
+        for entry in entries:
+            match = _OUTPUT_RE.fullmatch(entry.name)
+            if match and match.group(1) == prefix:
+                existing.add((match.group(2), int(match.group(3))))
+    return existing
 
-def get_next_image_id(output_path, background_id, prefix):
-    """Get the next available variation ID for a background - enables resume functionality."""
-    existing_files = list(output_path.glob(f"fake_{prefix}_synthetic_{background_id}_*.jpg"))
-    if not existing_files:
-        return 1
-    
-    # Extract variation IDs and find the next one
-    variation_ids = []
-    for file in existing_files:
-        match = re.search(r'_(\d{3})\.jpg$', file.name)
-        if match:
-            variation_ids.append(int(match.group(1)))
-    
-    if variation_ids:
-        return max(variation_ids) + 1
-    return 1
-
-def process_folder_with_variations(input_folder, output_folder, prefix, is_night=False, variations_per_bg=100):
-    """Process all backgrounds in a folder, creating multiple variations per background."""
+async def worker(client, sem, limiter, caches, seen_prompts, queue, saved_counts, save_pool=None):
+    """Consume jobs from the queue until cancelled, recording how many images each one saved."""
+    while True:
+        job = await queue.get()
+        try:
+            saved_counts.append(await generate_one(client, sem, limiter, caches, seen_prompts, save_pool=save_pool, **job))
+        finally:
+            queue.task_done()
+
+async def process_folder_with_variations(client, input_folder, output_folder, prefix, is_night=False, variations_per_bg=100, save_pool=None, sem=None, limiter=None):
+    """
+    Process all backgrounds in a folder, creating multiple variations per background.
+    Pass a shared sem/limiter to run several folders concurrently under one request budget.
+    """
     input_path = Path(input_folder)
     output_path = Path(output_folder)
     
     # Get all background images
-    bg_images = sorted(input_path.glob("fake_*_bg_*.jpg"))
+    bg_images = list_backgrounds(input_path)
     
     if not bg_images:
-        print(f"❌ No background images found in {input_folder}")
+        logger.error(f"❌ No background images found in {input_folder}")
         return
     
-    print(f"\n{'='*60}")
-    print(f"Processing {len(bg_images)} backgrounds ({prefix})")
-    print(f"Target: {variations_per_bg} variations per background")
-    print(f"{'='*60}\n")
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Processing {len(bg_images)} backgrounds ({prefix})")
+    logger.info(f"Target: {variations_per_bg} variations per background")
+    logger.info(f"{'='*60}\n")
+    
+    existing = scan_existing_variations(output_path, prefix)
     
-    total_generated = 0
+    # One job per missing (background, variation); a fixed pool of workers drains them, the
+    # semaphore caps requests in flight and the token bucket (not a fixed sleep) paces them
+    sem = sem or asyncio.Semaphore(MAX_CONCURRENT)
+    limiter = limiter or TokenBucket()
+    jobs = []
+    # Digests of prompts rendered by earlier runs, so a resume does not repeat them
+    seen_prompts = defaultdict(set)
     
     for bg_image in bg_images:
         background_id = extract_background_id(bg_image.name)
         if not background_id:
-            print(f"⚠️  Skipping {bg_image.name} - couldn't extract background ID")
+            logger.warning(f"⚠️  Skipping {bg_image.name} - couldn't extract background ID")
             continue
         
-        print(f"\n📸 Background: {bg_image.name} (ID: {background_id})")
+        logger.info(f"\n📸 Background: {bg_image.name} (ID: {background_id})")
         
-        # Get next variation ID (for resume functionality)
-        next_variation_id = get_next_image_id(output_path, background_id, prefix)
+        # Variation IDs with no saved file yet (for resume functionality)
+        remaining = [
+            variation_id for variation_id in range(1, variations_per_bg + 1)
+            if (background_id, variation_id) not in existing
+        ]
         
-        if next_variation_id > variations_per_bg:
-            print(f"  ✅ Already complete ({next_variation_id-1}/{variations_per_bg} variations)")
+        if not remaining:
+            logger.info(f"  ✅ Already complete ({variations_per_bg}/{variations_per_bg} variations)")
             continue
         
-        print(f"  Starting from variation {next_variation_id}/{variations_per_bg}")
+        logger.info(f"  Generating {len(remaining)} missing variations (first: {remaining[0]}/{variations_per_bg})")
+        seen_prompts[background_id] = load_prompt_log(output_path / f"{background_id}.prompts")
         
-        # Generate remaining variations
-        for variation_id in range(next_variation_id, variations_per_bg + 1):
-            success = process_image(
+        # Queue missing variations, VARIATIONS_PER_REQUEST x CANDIDATES_PER_REQUEST per request
+        per_request = VARIATIONS_PER_REQUEST * CANDIDATES_PER_REQUEST
+        for start in range(0, len(remaining), per_request):
+            jobs.append(dict(
                 image_path=bg_image,
                 output_path=output_path,
                 prefix=prefix,
                 background_id=background_id,
-                variation_id=variation_id,
+                variation_ids=remaining[start:start + per_request],
                 is_night=is_night
-            )
-            
-            if success:
-                total_generated += 1
-            
-            # Rate limiting to avoid API throttling
-            time.sleep(2)
+            ))
+    
+    if not jobs:
+        logger.info("\n✅ All backgrounds already complete")
+        return
     
-    print(f"\n{'='*60}")
-    print(f"✅ Complete! Generated {total_generated} new images")
-    print(f"{'='*60}\n")
+    caches = BackgroundCaches(client, is_night, Counter(job["background_id"] for job in jobs))
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    saved_counts = []
+    workers = [
+        asyncio.create_task(worker(client, sem, limiter, caches, seen_prompts, queue, saved_counts, save_pool))
+        for _ in range(NUM_WORKERS)
+    ]
+    try:
+        # put() blocks while the queue is full, so only QUEUE_SIZE jobs are pending at a time
+        for job in jobs:
+            await queue.put(job)
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await caches.close()
+    total_generated = sum(saved_counts)
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"✅ Complete! Generated {total_generated} new images")
+    logger.info(f"{'='*60}\n")
 
-def main():
+async def main():
     # Setup paths
     base_dir = Path("/Users/tadhgroche/Documents/Data-FYP ")
     fake_images_dir = base_dir / "CCTV_DATA_FYP" / "fake_images"
@@ -840,34 +1161,57 @@ def main():
     day_input = fake_images_dir / "synthetic_backgrounds" / "day"
     night_input = fake_images_dir / "synthetic_backgrounds" / "night"
     
-    print("\n" + "="*60)
-    print("FAKE BACKGROUND SYNTHETIC PERSON PLACEMENT")
-    print("="*60)
-    
-    # Process day images (target: 65 variations per background = 3250 total)
-    # Extra 5 variations to account for API error gaps
-    if day_input.exists():
-        process_folder_with_variations(
-            input_folder=day_input,
-            output_folder=day_output,
-            prefix="day",
-            is_night=False,
-            variations_per_bg=80
-        )
+    logger.info("\n" + "="*60)
+    logger.info("FAKE BACKGROUND SYNTHETIC PERSON PLACEMENT")
+    logger.info("="*60)
     
-    # Process night images (target: 65 variations per background = 3250 total)
-    # Extra 5 variations to account for API error gaps
-    if night_input.exists():
-        process_folder_with_variations(
-            input_folder=night_input,
-            output_folder=night_output,
-            prefix="night",
-            is_night=True,
-            variations_per_bg=80
+    # Load environment variables from .env file
+    load_dotenv()
+    
+    # One bounded pool for saving results (a process pool when ENCODE_PROCESSES is set, since PIL
+    # encode partly holds the GIL); leaving the with block waits for pending saves
+    if ENCODE_PROCESSES:
+        # Workers log unbuffered: they exit without flushing a MemoryHandler
+        save_pool = ProcessPoolExecutor(
+            max_workers=ENCODE_PROCESSES, initializer=functools.partial(configure_logging, buffered=False)
         )
+    else:
+        save_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="diskio")
+    with save_pool:
+        # One async client (and connection pool) for the whole run; API key comes from the environment
+        async with genai.Client(http_options=types.HttpOptions(timeout=REQUEST_TIMEOUT_MS)).aio as client:
+            # Day and night folders run concurrently, sharing one concurrency cap and rate budget
+            # (target: 65 variations per background = 3250 total per folder)
+            # Extra 5 variations to account for API error gaps
+            sem = asyncio.Semaphore(MAX_CONCURRENT)
+            limiter = TokenBucket()
+            folders = [
+                (day_input, day_output, "day", False),
+                (night_input, night_output, "night", True),
+            ]
+            await asyncio.gather(*(
+                process_folder_with_variations(
+                    client,
+                    input_folder=input_folder,
+                    output_folder=output_folder,
+                    prefix=prefix,
+                    is_night=is_night,
+                    variations_per_bg=80,
+                    save_pool=save_pool,
+                    sem=sem,
+                    limiter=limiter
+                )
+                for input_folder, output_folder, prefix, is_night in folders
+                if input_folder.exists()
+            ))
     
-    print("\n🎉 All processing complete!")
+    logger.info("\n🎉 All processing complete!")
 
 if __name__ == "__main__":
-    main()
+    log_handler = configure_logging()
+    try:
+        asyncio.run(main())
+    finally:
+        # Write out whatever is still buffered, including on Ctrl-C or a crash
+        log_handler.close()
 
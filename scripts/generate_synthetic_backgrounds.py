@@ -6,14 +6,378 @@ Creates both day (outdoor residential) and night (outdoor residential) backgroun
 """
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from PIL import Image
 from io import BytesIO
+import asyncio
+import hashlib
+import httpx
 import os
+import random
+import shutil
+import sqlite3
 from dotenv import load_dotenv
 import time
 
+MODEL = "gemini-2.5-flash-image-preview"
+
+# Concurrency / rate limiting for the Gemini calls
+MAX_CONCURRENT = 4       # requests kept in flight
+REQUESTS_PER_MINUTE = 10 # request budget; set to the project's Gemini image quota
+TOKENS_PER_MINUTE = 250_000  # input-token budget (prompts are estimated at 4 characters per token)
+BACKOFF_WINDOW = 60.0    # seconds the refill rate stays halved after a rate limit (HTTP 429)
+MAX_ATTEMPTS = 5         # tries per request on rate limits, server errors and network failures
+BACKOFF_MAX = 60.0       # cap (seconds) for the exponential backoff between attempts
+SCENES_PER_REQUEST = 1   # >1 asks for several backgrounds per request (experimental); any left out are requested singly
+REFERENCE_JPEG_QUALITY = 85  # non-JPEG references are uploaded as JPEG at this quality
+SAVE_QUEUE_SIZE = 16     # generated images waiting to be written
+SAVE_WORKERS = os.cpu_count() or 4  # consumers writing images off the event loop
+
+class RateLimiter:
+    """
+    Proactive async throttle: token buckets for requests and input tokens per minute, refilled
+    continuously and spent before each call, so requests go out as fast as the quota allows instead of
+    pausing a fixed time after every call. A rate limit halves both refill rates for BACKOFF_WINDOW
+    seconds (then the full rate is restored) and empties the request bucket so retries back off.
+    """
+
+    def __init__(self, rpm=REQUESTS_PER_MINUTE, tpm=TOKENS_PER_MINUTE, burst=MAX_CONCURRENT):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_capacity = burst
+        self.token_capacity = tpm * burst / rpm
+        self.available_request_tokens = self.request_capacity
+        self.available_token_tokens = self.token_capacity
+        self._slow_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        scale = 0.5 if now < self._slow_until else 1.0
+        elapsed = now - self._updated
+        self._updated = now
+        self.available_request_tokens = min(
+            self.request_capacity, self.available_request_tokens + elapsed * scale * self.rpm / 60
+        )
+        self.available_token_tokens = min(
+            self.token_capacity, self.available_token_tokens + elapsed * scale * self.tpm / 60
+        )
+        return scale
+
+    async def acquire(self, estimated_tokens=0):
+        """Wait until one request and estimated_tokens input tokens are available, then spend them."""
+        estimated_tokens = min(estimated_tokens, self.token_capacity)
+        async with self._lock:
+            while True:
+                scale = self._refill()
+                if self.available_request_tokens >= 1 and self.available_token_tokens >= estimated_tokens:
+                    self.available_request_tokens -= 1
+                    self.available_token_tokens -= estimated_tokens
+                    return
+                await asyncio.sleep(max(
+                    (1 - self.available_request_tokens) * 60 / (self.rpm * scale),
+                    (estimated_tokens - self.available_token_tokens) * 60 / (self.tpm * scale),
+                ))
+
+    def on_rate_limited(self):
+        """Multiplicative decrease: halve the refill rate for BACKOFF_WINDOW seconds."""
+        self._refill()
+        self._slow_until = time.monotonic() + BACKOFF_WINDOW
+        self.available_request_tokens = min(self.available_request_tokens, 0)
+
+def write_image(data, mime_type, output_path):
+    """
+    Write a generated image (runs in a worker thread) and return the sha256 of the file written.
+    JPEG responses are written as-is; other formats are transcoded, since the person placement
+    script only picks up fake_*_bg_*.jpg
+    """
+    if mime_type != "image/jpeg":
+        buffer = BytesIO()
+        Image.open(BytesIO(data)).save(buffer, "JPEG")
+        data = buffer.getvalue()
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return hashlib.sha256(data).hexdigest()
+
+def is_retryable(error):
+    """Rate limits (429), server-side failures (5xx) and network errors are worth another attempt."""
+    if isinstance(error, errors.APIError):
+        return error.code == 429 or isinstance(error, errors.ServerError)
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError, asyncio.TimeoutError))
+
+class GenerationCache:
+    """
+    Results of earlier runs, keyed on sha256(prompt) + sha256(reference image bytes) + output filename
+    in a small sqlite file, so re-running with the same scenes reuses the saved image instead of calling
+    the API again. Only identical prompts hit: the prompts share most of their text, so a similarity
+    threshold would treat different scenes as the same one. The filename is part of the key because
+    the scene lists wrap around (two slots can share a prompt but must stay different images).
+    This is also the run's checkpoint: each row is committed as soon as its image is written, and
+    stores the image's sha256 so a file truncated by a crash is generated again.
+    """
+
+    def __init__(self, db_path):
+        self._db = sqlite3.connect(db_path, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS backgrounds ("
+            "prompt_sha TEXT, reference_sha TEXT, filename TEXT, output_path TEXT, image_sha TEXT, "
+            "PRIMARY KEY (prompt_sha, reference_sha, filename))"
+        )
+
+    def lookup(self, prompt, reference_sha, output_path):
+        """Path of a saved image generated from this prompt and reference for output_path's filename, or None."""
+        row = self._db.execute(
+            "SELECT output_path, image_sha FROM backgrounds "
+            "WHERE prompt_sha = ? AND reference_sha = ? AND filename = ?",
+            (hashlib.sha256(prompt.encode()).hexdigest(), reference_sha, os.path.basename(output_path)),
+        ).fetchone()
+        if not row or not os.path.isfile(row[0]) or os.path.getsize(row[0]) == 0:
+            return None
+        with open(row[0], "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != row[1]:
+                return None
+        return row[0]
+
+    def insert(self, prompt, reference_sha, output_path, image_sha):
+        self._db.execute(
+            "INSERT OR REPLACE INTO backgrounds VALUES (?, ?, ?, ?, ?)",
+            (
+                hashlib.sha256(prompt.encode()).hexdigest(), reference_sha,
+                os.path.basename(output_path), os.path.abspath(output_path), image_sha,
+            ),
+        )
+
+    def close(self):
+        self._db.close()
+
 class SyntheticCCTVGenerator:
+    # Scene descriptions, indexed by variation (wrapping around); built once, shared by every call
+    _DAY_SCENES = (
+        # Images 1-29: Residential house-mounted CCTV looking outward - International styles
+        "American single-story suburban backyard camera from house looking out at deck and pool area",
+        "Swedish two-story house backyard camera looking out at wooden deck and birch trees",
+        "British single-story terraced house backyard camera looking out at small garden and fence",
+        "American single-story ranch house backyard camera looking out at patio and lawn",
+        "German two-story house backyard camera looking out at garden and hedge",
+        "Australian single-story house backyard camera looking out at veranda and native plants",
+        "Canadian two-story house backyard camera looking out at deck and maple trees",
+        "Dutch single-story house backyard camera looking out at garden and canal view",
+        "American two-story colonial house backyard camera looking out at porch and garden",
+        "Scandinavian single-story house backyard camera looking out at deck and pine trees",
+        "American two-story suburban house side entrance camera looking out at driveway and lawn",
+        "British single-story Victorian house front camera looking out at garden and street",
+        "American single-story ranch house garage camera looking out at driveway and street",
+        "Swedish two-story house front door camera looking out at walkway and birch trees",
+        "German single-story house corner camera looking out at front yard and hedge",
+        "Australian two-story house wall camera looking out at backyard and native garden",
+        "American single-story colonial house entrance camera looking out at steps and landscaping",
+        "Dutch two-story house side camera looking out at walkway and canal",
+        "Canadian single-story house front porch camera looking out at driveway and maple trees",
+        "British two-story house garden camera looking out at flower beds and fence",
+        "American single-story suburban house wall camera looking out at side yard and lawn",
+        "Scandinavian two-story house front entrance camera looking out at walkway and pine trees",
+        "German single-story house garage camera looking out at driveway and hedge",
+        "Australian two-story house side camera looking out at entrance and native plants",
+        "American single-story ranch house corner camera looking out at front yard and driveway",
+        "Swedish two-story house garden camera looking out at flower beds and birch trees",
+        "British single-story house front porch camera looking out at steps and street",
+        "Dutch two-story house corner camera looking out at garden and canal view",
+        "Canadian single-story house wall camera looking out at side yard and maple trees",
+
+        # Images 30-39: Countryside scenes
+        "countryside farmhouse with barn and fields",
+        "rural property with fence and open fields",
+        "countryside driveway with trees and hedges",
+        "farm entrance with gate and rural landscape",
+        "countryside garden with vegetable patches",
+        "rural backyard with chicken coop and fields",
+        "countryside patio overlooking farmland",
+        "rural walkway with wildflowers and meadows",
+        "countryside garage with tractor and farm equipment",
+        "rural property corner showing barn and pastures",
+
+        # Images 40-49: Commercial/Retail - Building-mounted CCTV looking outward
+        "petrol station building wall camera mounted at 3 meters looking out at forecourt and fuel pumps",
+        "city centre shop building wall camera mounted at entrance level looking out at street and pedestrians",
+        "shopping centre building wall camera mounted at 2.5 meters looking out at parking area and entrance",
+        "retail store building wall camera mounted at shop level looking out at parking area and trolleys",
+        "convenience store building wall camera mounted at entrance looking out at outdoor seating and street",
+        "petrol station building corner camera mounted at 3 meters looking out at forecourt and pumps",
+        "city centre building wall camera mounted at shop level looking out at pedestrian walkway and street",
+        "retail complex building wall camera mounted at entrance level looking out at multiple shop entrances",
+        "petrol station building wall camera mounted at 2.5 meters looking out at forecourt and car wash",
+        "city centre shop building wall camera mounted at shop level looking out at street and shop fronts"
+    )
+    _NIGHT_SCENES = (
+        # Images 1-29: Residential house-mounted CCTV looking outward at night - International styles
+        "American single-story suburban backyard camera from house looking out at deck and pool area at night",
+        "Swedish two-story house backyard camera looking out at wooden deck and birch trees at night",
+        "British single-story terraced house backyard camera looking out at small garden and fence at night",
+        "American single-story ranch house backyard camera looking out at patio and lawn at night",
+        "German two-story house backyard camera looking out at garden and hedge at night",
+        "Australian single-story house backyard camera looking out at veranda and native plants at night",
+        "Canadian two-story house backyard camera looking out at deck and maple trees at night",
+        "Dutch single-story house backyard camera looking out at garden and canal view at night",
+        "American two-story colonial house backyard camera looking out at porch and garden at night",
+        "Scandinavian single-story house backyard camera looking out at deck and pine trees at night",
+        "American two-story suburban house side entrance camera looking out at driveway and lawn at night",
+        "British single-story Victorian house front camera looking out at garden and street at night",
+        "American single-story ranch house garage camera looking out at driveway and street at night",
+        "Swedish two-story house front door camera looking out at walkway and birch trees at night",
+        "German single-story house corner camera looking out at front yard and hedge at night",
+        "Australian two-story house wall camera looking out at backyard and native garden at night",
+        "American single-story colonial house entrance camera looking out at steps and landscaping at night",
+        "Dutch two-story house side camera looking out at walkway and canal at night",
+        "Canadian single-story house front porch camera looking out at driveway and maple trees at night",
+        "British two-story house garden camera looking out at flower beds and fence at night",
+        "American single-story suburban house wall camera looking out at side yard and lawn at night",
+        "Scandinavian two-story house front entrance camera looking out at walkway and pine trees at night",
+        "German single-story house garage camera looking out at driveway and hedge at night",
+        "Australian two-story house side camera looking out at entrance and native plants at night",
+        "American single-story ranch house corner camera looking out at front yard and driveway at night",
+        "Swedish two-story house garden camera looking out at flower beds and birch trees at night",
+        "British single-story house front porch camera looking out at steps and street at night",
+        "Dutch two-story house corner camera looking out at garden and canal view at night",
+        "Canadian single-story house wall camera looking out at side yard and maple trees at night",
+
+        # Images 30-39: Countryside scenes
+        "countryside farmhouse with barn and fields at night",
+        "rural property with fence and open fields at night",
+        "countryside driveway with trees and hedges at night",
+        "farm entrance with gate and rural landscape at night",
+        "countryside garden with vegetable patches at night",
+        "rural backyard with chicken coop and fields at night",
+        "countryside patio overlooking farmland at night",
+        "rural walkway with wildflowers and meadows at night",
+        "countryside garage with tractor and farm equipment at night",
+        "rural property corner showing barn and pastures at night",
+
+        # Images 40-49: Commercial/Retail - Building-mounted CCTV looking outward
+        "petrol station building wall camera mounted at 3 meters looking out at forecourt and fuel pumps at night",
+        "city centre shop building wall camera mounted at entrance level looking out at street and pedestrians at night",
+        "shopping centre building wall camera mounted at 2.5 meters looking out at parking area and entrance at night",
+        "retail store building wall camera mounted at shop level looking out at parking area and trolleys at night",
+        "convenience store building wall camera mounted at entrance looking out at outdoor seating and street at night",
+        "petrol station building corner camera mounted at 3 meters looking out at forecourt and pumps at night",
+        "city centre building wall camera mounted at shop level looking out at pedestrian walkway and street at night",
+        "retail complex building wall camera mounted at entrance level looking out at multiple shop entrances at night",
+        "petrol station building wall camera mounted at 2.5 meters looking out at forecourt and car wash at night",
+        "city centre shop building wall camera mounted at shop level looking out at street and shop fronts at night"
+    )
+    
+    # Fill-ins for the {opening}/{image_rule} placeholders of the templates below: a single-scene request
+    # insists on exactly one image, a batched one on one separate image per numbered scene
+    _SINGLE_IMAGE = dict(
+        opening="Create a SINGLE surveillance camera background scene",
+        image_rule="- CRITICAL: Generate ONLY ONE single image, NOT multiple images or a grid of images ",
+    )
+    _BATCH_IMAGES = dict(
+        opening="Create each surveillance camera background scene",
+        image_rule="- CRITICAL: Generate each scene as its own separate image, NEVER combine scenes into a grid or collage ",
+    )
+    
+    # Prompt templates, built once: everything except the scene is identical for every image of a kind
+    _DAY_TEMPLATE = (
+        "{opening} that matches the exact same style and quality "
+        "as the reference image. The new background must have: "
+        "- EXACT same surveillance camera quality (slightly blurry, not high-resolution, low-quality) "
+        "- EXACT same color grading and desaturation "
+        "- EXACT same lighting characteristics (soft, diffused lighting) "
+        "- EXACT same surveillance camera angle and perspective (elevated, looking down, but NOT bird's eye view) "
+        "- CRITICAL: Camera mounting height based on building type: "
+        "  * Single-story house: Mount camera HIGH (3-4 meters) looking down at ground level "
+        "  * Two-story house: Mount camera LOWER (2-2.5 meters) looking slightly down "
+        "  * Commercial buildings: Mount at entrance level (2.5-3 meters) looking outward "
+        "- CRITICAL: NO bird's eye view or roof-mounted cameras - show realistic CCTV mounting height "
+        "- CRITICAL: Camera should NOT appear to be on the roof of the house "
+        "- EXACT same grain, texture, and compression artifacts as the reference image "
+        "- EXACT same surveillance camera distortion and field of view "
+        "- EXACT same image quality degradation, noise, and pixelation as the reference "
+        "- EXACT same compression artifacts and digital noise patterns "
+        "- EXACT same low-resolution, grainy surveillance camera aesthetic "
+        "- Slightly more grainy and pixelated than the reference - like older, lower-end surveillance camera "
+        "- Slightly more compression artifacts and digital noise for authentic CCTV look "
+        "- EXACT same timestamp overlay style (top-right corner, white digits, fuzzy) "
+        "- EXACT same camera label style (bottom-left corner, faint, low-res) "
+        "- Create a DIFFERENT household outdoor environment but maintain the exact same surveillance aesthetic "
+        "- The new scene should be a {scene} "
+        "- Focus on outdoor areas that would be monitored by surveillance cameras "
+        "- CRITICAL: This is a RESIDENTIAL scene - show typical suburban/urban house and garden areas "
+        "- CRITICAL: NO countryside, rural, farm, or agricultural elements - this is a residential house "
+        "- CRITICAL: Show typical residential elements: house walls, driveways, gardens, fences, walkways "
+        "- Vary the camera positioning: some from corner angles, some from side views, some from different heights "
+        "- Show different perspectives: corner views, side angles, entrance views, garden areas "
+        "- Include realistic camera mounting positions: house corners, wall-mounted, roof-mounted, entrance-mounted "
+        "- Show cameras looking outward from the HOUSE towards garden, driveway, street, and walkways "
+        "- Include corner cameras that capture multiple areas simultaneously "
+        "- Include residential outdoor elements: house walls, driveways, gardens, fences, walkways, patios "
+        "- Show typical suburban residential setting with house, garden, driveway, and street access "
+        "- NO fisheye lens distortion - maintain the exact same camera lens type as the reference "
+        "- Keep the same field of view and perspective style as the reference image "
+        "- Ensure the camera angle and lens characteristics match exactly "
+        "- Ensure the new background looks like it was captured by the same surveillance camera system "
+        "- Maintain the same vintage, slightly aged surveillance footage look "
+        "- Keep the same overall mood and atmosphere as the reference "
+        "- Make it look like authentic surveillance footage from the same camera system "
+        "{image_rule}"
+        "- CRITICAL: NO humans, people, or persons anywhere in the scene - this is a background only "
+        "- CRITICAL: NO vehicles with people inside - only empty cars or no cars at all "
+        "- CRITICAL: Match the EXACT same low-quality, grainy, pixelated look as the reference image "
+        "- CRITICAL: Do NOT generate high-quality, sharp, or clean images - they must look like old CCTV footage "
+        "- The only difference should be the physical location/scene and camera angle, everything else should match exactly"
+    )
+    _NIGHT_TEMPLATE = (
+        "{opening} that matches the exact same style and quality "
+        "as the reference image. The new background must have: "
+        "- EXACT same surveillance camera quality (slightly blurry, not high-resolution, low-quality) "
+        "- EXACT same color grading and desaturation (grayscale/monochrome) "
+        "- EXACT same lighting characteristics (dim, low-light, infrared-style) "
+        "- EXACT same surveillance camera angle and perspective (elevated, looking down, but NOT bird's eye view) "
+        "- CRITICAL: Camera mounting height based on building type: "
+        "  * Single-story house: Mount camera HIGH (3-4 meters) looking down at ground level "
+        "  * Two-story house: Mount camera LOWER (2-2.5 meters) looking slightly down "
+        "  * Commercial buildings: Mount at entrance level (2.5-3 meters) looking outward "
+        "- CRITICAL: NO bird's eye view or roof-mounted cameras - show realistic CCTV mounting height "
+        "- CRITICAL: Camera should NOT appear to be on the roof of the house "
+        "- EXACT same grain, texture, and compression artifacts as the reference image "
+        "- EXACT same surveillance camera distortion and field of view "
+        "- EXACT same image quality degradation, noise, and pixelation as the reference "
+        "- EXACT same compression artifacts and digital noise patterns "
+        "- EXACT same low-resolution, grainy surveillance camera aesthetic "
+        "- EVEN LOWER quality than day scenes - more grainy, more pixelated, more compression artifacts "
+        "- EVEN MORE blurry and degraded - like very old, low-end surveillance camera footage "
+        "- EXACT same timestamp overlay style (top-right corner, white digits, fuzzy) "
+        "- EXACT same camera label style (bottom-left corner, faint, low-res) "
+        "- Create a DIFFERENT outdoor residential environment but maintain the exact same surveillance aesthetic "
+        "- The new scene should be a {scene} "
+        "- Focus on outdoor areas that would be monitored by surveillance cameras at night "
+        "- Show the same type of outdoor areas as day scenes but in nighttime/grayscale surveillance style "
+        "- CRITICAL: This is a RESIDENTIAL scene - show typical suburban/urban house and garden areas "
+        "- CRITICAL: NO countryside, rural, farm, or agricultural elements - this is a residential house "
+        "- CRITICAL: Show typical residential elements: house walls, driveways, gardens, fences, walkways "
+        "- Vary the camera positioning: some from corner angles, some from side views, some from different heights "
+        "- Show different perspectives: corner views, side angles, entrance views, garden areas "
+        "- Include realistic camera mounting positions: house corners, wall-mounted, roof-mounted, entrance-mounted "
+        "- Show cameras looking outward from the HOUSE towards garden, driveway, street, and walkways "
+        "- Include corner cameras that capture multiple areas simultaneously "
+        "- Include residential outdoor elements: house walls, driveways, gardens, fences, walkways, patios "
+        "- Show typical suburban residential setting with house, garden, driveway, and street access "
+        "- NO fisheye lens distortion - maintain the exact same camera lens type as the reference "
+        "- Keep the same field of view and perspective style as the reference image "
+        "- Ensure the camera angle and lens characteristics match exactly "
+        "- Ensure the new background looks like it was captured by the same surveillance camera system "
+        "- Maintain the same vintage, slightly aged surveillance footage look "
+        "- Keep the same overall mood and atmosphere as the reference "
+        "- Make it look like authentic surveillance footage from the same camera system "
+        "{image_rule}"
+        "- CRITICAL: NO humans, people, or persons anywhere in the scene - this is a background only "
+        "- CRITICAL: NO vehicles with people inside - only empty cars or no cars at all "
+        "- CRITICAL: Match the EXACT same low-quality, grainy, pixelated look as the reference image "
+        "- CRITICAL: Do NOT generate high-quality, sharp, or clean images - they must look like old CCTV footage "
+        "- The only difference should be the physical location/scene and camera angle, everything else should match exactly"
+    )
+    
     def __init__(self, output_dir, reference_day_path, reference_night_path):
         self.output_dir = output_dir
         self.reference_day_path = reference_day_path
@@ -29,251 +393,139 @@ class SyntheticCCTVGenerator:
         os.makedirs(os.path.join(output_dir, "day"), exist_ok=True)
         os.makedirs(os.path.join(output_dir, "night"), exist_ok=True)
         
-    def get_day_prompt(self, variation):
-        """Get day-specific prompt for outdoor residential scenes with varied angles"""
-        day_scenes = [
-            # Images 1-29: Residential house-mounted CCTV looking outward - International styles
-            "American single-story suburban backyard camera from house looking out at deck and pool area",
-            "Swedish two-story house backyard camera looking out at wooden deck and birch trees",
-            "British single-story terraced house backyard camera looking out at small garden and fence",
-            "American single-story ranch house backyard camera looking out at patio and lawn",
-            "German two-story house backyard camera looking out at garden and hedge",
-            "Australian single-story house backyard camera looking out at veranda and native plants",
-            "Canadian two-story house backyard camera looking out at deck and maple trees",
-            "Dutch single-story house backyard camera looking out at garden and canal view",
-            "American two-story colonial house backyard camera looking out at porch and garden",
-            "Scandinavian single-story house backyard camera looking out at deck and pine trees",
-            "American two-story suburban house side entrance camera looking out at driveway and lawn",
-            "British single-story Victorian house front camera looking out at garden and street",
-            "American single-story ranch house garage camera looking out at driveway and street",
-            "Swedish two-story house front door camera looking out at walkway and birch trees",
-            "German single-story house corner camera looking out at front yard and hedge",
-            "Australian two-story house wall camera looking out at backyard and native garden",
-            "American single-story colonial house entrance camera looking out at steps and landscaping",
-            "Dutch two-story house side camera looking out at walkway and canal",
-            "Canadian single-story house front porch camera looking out at driveway and maple trees",
-            "British two-story house garden camera looking out at flower beds and fence",
-            "American single-story suburban house wall camera looking out at side yard and lawn",
-            "Scandinavian two-story house front entrance camera looking out at walkway and pine trees",
-            "German single-story house garage camera looking out at driveway and hedge",
-            "Australian two-story house side camera looking out at entrance and native plants",
-            "American single-story ranch house corner camera looking out at front yard and driveway",
-            "Swedish two-story house garden camera looking out at flower beds and birch trees",
-            "British single-story house front porch camera looking out at steps and street",
-            "Dutch two-story house corner camera looking out at garden and canal view",
-            "Canadian single-story house wall camera looking out at side yard and maple trees",
-            
-            # Images 30-39: Countryside scenes
-            "countryside farmhouse with barn and fields",
-            "rural property with fence and open fields",
-            "countryside driveway with trees and hedges",
-            "farm entrance with gate and rural landscape",
-            "countryside garden with vegetable patches",
-            "rural backyard with chicken coop and fields",
-            "countryside patio overlooking farmland",
-            "rural walkway with wildflowers and meadows",
-            "countryside garage with tractor and farm equipment",
-            "rural property corner showing barn and pastures",
-            
-            # Images 40-49: Commercial/Retail - Building-mounted CCTV looking outward
-            "petrol station building wall camera mounted at 3 meters looking out at forecourt and fuel pumps",
-            "city centre shop building wall camera mounted at entrance level looking out at street and pedestrians",
-            "shopping centre building wall camera mounted at 2.5 meters looking out at parking area and entrance",
-            "retail store building wall camera mounted at shop level looking out at parking area and trolleys",
-            "convenience store building wall camera mounted at entrance looking out at outdoor seating and street",
-            "petrol station building corner camera mounted at 3 meters looking out at forecourt and pumps",
-            "city centre building wall camera mounted at shop level looking out at pedestrian walkway and street",
-            "retail complex building wall camera mounted at entrance level looking out at multiple shop entrances",
-            "petrol station building wall camera mounted at 2.5 meters looking out at forecourt and car wash",
-            "city centre shop building wall camera mounted at shop level looking out at street and shop fronts"
-        ]
+        # Cache of earlier results
+        self.cache = GenerationCache(os.path.join(output_dir, "generation_cache.sqlite"))
         
-        scene = day_scenes[variation % len(day_scenes)]
+        # Read each reference image once: its hash keys the cache and its bytes are sent with every
+        # request (no decode per call, no re-encode by the SDK). JPEG files are sent as-is; others
+        # (the PNG day reference) are encoded to JPEG once, which is far smaller to upload
+        self._reference_sha = {}
+        self._reference_parts = {}
+        for path in (reference_day_path, reference_night_path):
+            with open(path, "rb") as f:
+                data = f.read()
+            self._reference_sha[path] = hashlib.sha256(data).hexdigest()
+            if data[:2] != b"\xff\xd8":
+                buffer = BytesIO()
+                Image.open(BytesIO(data)).convert("RGB").save(buffer, "JPEG", quality=REFERENCE_JPEG_QUALITY)
+                data = buffer.getvalue()
+            self._reference_parts[path] = types.Part.from_bytes(data=data, mime_type="image/jpeg")
         
-        return (
-            f"Create a SINGLE surveillance camera background scene that matches the exact same style and quality "
-            f"as the reference image. The new background must have: "
-            f"- EXACT same surveillance camera quality (slightly blurry, not high-resolution, low-quality) "
-            f"- EXACT same color grading and desaturation "
-            f"- EXACT same lighting characteristics (soft, diffused lighting) "
-            f"- EXACT same surveillance camera angle and perspective (elevated, looking down, but NOT bird's eye view) "
-            f"- CRITICAL: Camera mounting height based on building type: "
-            f"  * Single-story house: Mount camera HIGH (3-4 meters) looking down at ground level "
-            f"  * Two-story house: Mount camera LOWER (2-2.5 meters) looking slightly down "
-            f"  * Commercial buildings: Mount at entrance level (2.5-3 meters) looking outward "
-            f"- CRITICAL: NO bird's eye view or roof-mounted cameras - show realistic CCTV mounting height "
-            f"- CRITICAL: Camera should NOT appear to be on the roof of the house "
-            f"- EXACT same grain, texture, and compression artifacts as the reference image "
-            f"- EXACT same surveillance camera distortion and field of view "
-            f"- EXACT same image quality degradation, noise, and pixelation as the reference "
-            f"- EXACT same compression artifacts and digital noise patterns "
-            f"- EXACT same low-resolution, grainy surveillance camera aesthetic "
-            f"- Slightly more grainy and pixelated than the reference - like older, lower-end surveillance camera "
-            f"- Slightly more compression artifacts and digital noise for authentic CCTV look "
-            f"- EXACT same timestamp overlay style (top-right corner, white digits, fuzzy) "
-            f"- EXACT same camera label style (bottom-left corner, faint, low-res) "
-            f"- Create a DIFFERENT household outdoor environment but maintain the exact same surveillance aesthetic "
-            f"- The new scene should be a {scene} "
-            f"- Focus on outdoor areas that would be monitored by surveillance cameras "
-            f"- CRITICAL: This is a RESIDENTIAL scene - show typical suburban/urban house and garden areas "
-            f"- CRITICAL: NO countryside, rural, farm, or agricultural elements - this is a residential house "
-            f"- CRITICAL: Show typical residential elements: house walls, driveways, gardens, fences, walkways "
-            f"- Vary the camera positioning: some from corner angles, some from side views, some from different heights "
-            f"- Show different perspectives: corner views, side angles, entrance views, garden areas "
-            f"- Include realistic camera mounting positions: house corners, wall-mounted, roof-mounted, entrance-mounted "
-            f"- Show cameras looking outward from the HOUSE towards garden, driveway, street, and walkways "
-            f"- Include corner cameras that capture multiple areas simultaneously "
-            f"- Include residential outdoor elements: house walls, driveways, gardens, fences, walkways, patios "
-            f"- Show typical suburban residential setting with house, garden, driveway, and street access "
-            f"- NO fisheye lens distortion - maintain the exact same camera lens type as the reference "
-            f"- Keep the same field of view and perspective style as the reference image "
-            f"- Ensure the camera angle and lens characteristics match exactly "
-            f"- Ensure the new background looks like it was captured by the same surveillance camera system "
-            f"- Maintain the same vintage, slightly aged surveillance footage look "
-            f"- Keep the same overall mood and atmosphere as the reference "
-            f"- Make it look like authentic surveillance footage from the same camera system "
-            f"- CRITICAL: Generate ONLY ONE single image, NOT multiple images or a grid of images "
-            f"- CRITICAL: NO humans, people, or persons anywhere in the scene - this is a background only "
-            f"- CRITICAL: NO vehicles with people inside - only empty cars or no cars at all "
-            f"- CRITICAL: Match the EXACT same low-quality, grainy, pixelated look as the reference image "
-            f"- CRITICAL: Do NOT generate high-quality, sharp, or clean images - they must look like old CCTV footage "
-            f"- The only difference should be the physical location/scene and camera angle, everything else should match exactly"
-        )
+    def get_day_scene(self, variation):
+        """Get the day scene description for one variation"""
+        return self._DAY_SCENES[variation % len(self._DAY_SCENES)]
+    
+    def get_night_scene(self, variation):
+        """Get the night scene description for one variation"""
+        return self._NIGHT_SCENES[variation % len(self._NIGHT_SCENES)]
+    
+    def get_day_prompt(self, variation):
+        """Get day-specific prompt for outdoor residential scenes with varied angles"""
+        return self._DAY_TEMPLATE.format(scene=self.get_day_scene(variation), **self._SINGLE_IMAGE)
     
     def get_night_prompt(self, variation):
         """Get night-specific prompt for outdoor residential scenes with varied angles"""
-        night_scenes = [
-            # Images 1-29: Residential house-mounted CCTV looking outward at night - International styles
-            "American single-story suburban backyard camera from house looking out at deck and pool area at night",
-            "Swedish two-story house backyard camera looking out at wooden deck and birch trees at night",
-            "British single-story terraced house backyard camera looking out at small garden and fence at night",
-            "American single-story ranch house backyard camera looking out at patio and lawn at night",
-            "German two-story house backyard camera looking out at garden and hedge at night",
-            "Australian single-story house backyard camera looking out at veranda and native plants at night",
-            "Canadian two-story house backyard camera looking out at deck and maple trees at night",
-            "Dutch single-story house backyard camera looking out at garden and canal view at night",
-            "American two-story colonial house backyard camera looking out at porch and garden at night",
-            "Scandinavian single-story house backyard camera looking out at deck and pine trees at night",
-            "American two-story suburban house side entrance camera looking out at driveway and lawn at night",
-            "British single-story Victorian house front camera looking out at garden and street at night",
-            "American single-story ranch house garage camera looking out at driveway and street at night",
-            "Swedish two-story house front door camera looking out at walkway and birch trees at night",
-            "German single-story house corner camera looking out at front yard and hedge at night",
-            "Australian two-story house wall camera looking out at backyard and native garden at night",
-            "American single-story colonial house entrance camera looking out at steps and landscaping at night",
-            "Dutch two-story house side camera looking out at walkway and canal at night",
-            "Canadian single-story house front porch camera looking out at driveway and maple trees at night",
-            "British two-story house garden camera looking out at flower beds and fence at night",
-            "American single-story suburban house wall camera looking out at side yard and lawn at night",
-            "Scandinavian two-story house front entrance camera looking out at walkway and pine trees at night",
-            "German single-story house garage camera looking out at driveway and hedge at night",
-            "Australian two-story house side camera looking out at entrance and native plants at night",
-            "American single-story ranch house corner camera looking out at front yard and driveway at night",
-            "Swedish two-story house garden camera looking out at flower beds and birch trees at night",
-            "British single-story house front porch camera looking out at steps and street at night",
-            "Dutch two-story house corner camera looking out at garden and canal view at night",
-            "Canadian single-story house wall camera looking out at side yard and maple trees at night",
-            
-            # Images 30-39: Countryside scenes
-            "countryside farmhouse with barn and fields at night",
-            "rural property with fence and open fields at night",
-            "countryside driveway with trees and hedges at night",
-            "farm entrance with gate and rural landscape at night",
-            "countryside garden with vegetable patches at night",
-            "rural backyard with chicken coop and fields at night",
-            "countryside patio overlooking farmland at night",
-            "rural walkway with wildflowers and meadows at night",
-            "countryside garage with tractor and farm equipment at night",
-            "rural property corner showing barn and pastures at night",
-            
-            # Images 40-49: Commercial/Retail - Building-mounted CCTV looking outward
-            "petrol station building wall camera mounted at 3 meters looking out at forecourt and fuel pumps at night",
-            "city centre shop building wall camera mounted at entrance level looking out at street and pedestrians at night",
-            "shopping centre building wall camera mounted at 2.5 meters looking out at parking area and entrance at night",
-            "retail store building wall camera mounted at shop level looking out at parking area and trolleys at night",
-            "convenience store building wall camera mounted at entrance looking out at outdoor seating and street at night",
-            "petrol station building corner camera mounted at 3 meters looking out at forecourt and pumps at night",
-            "city centre building wall camera mounted at shop level looking out at pedestrian walkway and street at night",
-            "retail complex building wall camera mounted at entrance level looking out at multiple shop entrances at night",
-            "petrol station building wall camera mounted at 2.5 meters looking out at forecourt and car wash at night",
-            "city centre shop building wall camera mounted at shop level looking out at street and shop fronts at night"
+        return self._NIGHT_TEMPLATE.format(scene=self.get_night_scene(variation), **self._SINGLE_IMAGE)
+    
+    def get_batch_prompt(self, mode, variations):
+        """One prompt asking for a background per variation: the shared instructions, then the numbered scenes"""
+        if mode == "day":
+            template, get_scene = self._DAY_TEMPLATE, self.get_day_scene
+        else:
+            template, get_scene = self._NIGHT_TEMPLATE, self.get_night_scene
+        lines = [
+            f"Return {len(variations)} separate images, in order, one per numbered scene below. "
+            "Each image follows these instructions independently: "
+            + template.format(scene="scene from the numbered list below", **self._BATCH_IMAGES)
         ]
+        lines += [f"SCENE {n}: {get_scene(i)}" for n, i in enumerate(variations, 1)]
+        return "\n".join(lines)
+    
+    async def request_images(self, sem, limiter, prompt, reference_image_path):
+        """
+        Call Google Nano Banana with the prompt and reference image (at most `sem` requests run at once,
+        paced by the shared RateLimiter) and return the response's image parts
+        """
+        reference_image = self._reference_parts[reference_image_path]
         
-        scene = night_scenes[variation % len(night_scenes)]
+        # Generate content using both text prompt and reference image
+        async with sem:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                await limiter.acquire(estimated_tokens=len(prompt) // 4)
+                try:
+                    response = await self.client.aio.models.generate_content(
+                        model=MODEL,
+                        contents=[prompt, reference_image],
+                    )
+                    break
+                except Exception as e:
+                    # Invalid requests (other 4xx) fail straight away
+                    if not is_retryable(e) or attempt == MAX_ATTEMPTS:
+                        raise
+                    if getattr(e, "code", None) == 429:
+                        limiter.on_rate_limited()
+                    # Exponential backoff with jitter, so concurrent retries do not line up
+                    delay = min(BACKOFF_MAX, 2 ** attempt) + random.random()
+                    print(f"⏳ {e.__class__.__name__}: {e}; retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_ATTEMPTS})")
+                    await asyncio.sleep(delay)
         
-        return (
-            f"Create a SINGLE surveillance camera background scene that matches the exact same style and quality "
-            f"as the reference image. The new background must have: "
-            f"- EXACT same surveillance camera quality (slightly blurry, not high-resolution, low-quality) "
-            f"- EXACT same color grading and desaturation (grayscale/monochrome) "
-            f"- EXACT same lighting characteristics (dim, low-light, infrared-style) "
-            f"- EXACT same surveillance camera angle and perspective (elevated, looking down, but NOT bird's eye view) "
-            f"- CRITICAL: Camera mounting height based on building type: "
-            f"  * Single-story house: Mount camera HIGH (3-4 meters) looking down at ground level "
-            f"  * Two-story house: Mount camera LOWER (2-2.5 meters) looking slightly down "
-            f"  * Commercial buildings: Mount at entrance level (2.5-3 meters) looking outward "
-            f"- CRITICAL: NO bird's eye view or roof-mounted cameras - show realistic CCTV mounting height "
-            f"- CRITICAL: Camera should NOT appear to be on the roof of the house "
-            f"- EXACT same grain, texture, and compression artifacts as the reference image "
-            f"- EXACT same surveillance camera distortion and field of view "
-            f"- EXACT same image quality degradation, noise, and pixelation as the reference "
-            f"- EXACT same compression artifacts and digital noise patterns "
-            f"- EXACT same low-resolution, grainy surveillance camera aesthetic "
-            f"- EVEN LOWER quality than day scenes - more grainy, more pixelated, more compression artifacts "
-            f"- EVEN MORE blurry and degraded - like very old, low-end surveillance camera footage "
-            f"- EXACT same timestamp overlay style (top-right corner, white digits, fuzzy) "
-            f"- EXACT same camera label style (bottom-left corner, faint, low-res) "
-            f"- Create a DIFFERENT outdoor residential environment but maintain the exact same surveillance aesthetic "
-            f"- The new scene should be a {scene} "
-            f"- Focus on outdoor areas that would be monitored by surveillance cameras at night "
-            f"- Show the same type of outdoor areas as day scenes but in nighttime/grayscale surveillance style "
-            f"- CRITICAL: This is a RESIDENTIAL scene - show typical suburban/urban house and garden areas "
-            f"- CRITICAL: NO countryside, rural, farm, or agricultural elements - this is a residential house "
-            f"- CRITICAL: Show typical residential elements: house walls, driveways, gardens, fences, walkways "
-            f"- Vary the camera positioning: some from corner angles, some from side views, some from different heights "
-            f"- Show different perspectives: corner views, side angles, entrance views, garden areas "
-            f"- Include realistic camera mounting positions: house corners, wall-mounted, roof-mounted, entrance-mounted "
-            f"- Show cameras looking outward from the HOUSE towards garden, driveway, street, and walkways "
-            f"- Include corner cameras that capture multiple areas simultaneously "
-            f"- Include residential outdoor elements: house walls, driveways, gardens, fences, walkways, patios "
-            f"- Show typical suburban residential setting with house, garden, driveway, and street access "
-            f"- NO fisheye lens distortion - maintain the exact same camera lens type as the reference "
-            f"- Keep the same field of view and perspective style as the reference image "
-            f"- Ensure the camera angle and lens characteristics match exactly "
-            f"- Ensure the new background looks like it was captured by the same surveillance camera system "
-            f"- Maintain the same vintage, slightly aged surveillance footage look "
-            f"- Keep the same overall mood and atmosphere as the reference "
-            f"- Make it look like authentic surveillance footage from the same camera system "
-            f"- CRITICAL: Generate ONLY ONE single image, NOT multiple images or a grid of images "
-            f"- CRITICAL: NO humans, people, or persons anywhere in the scene - this is a background only "
-            f"- CRITICAL: NO vehicles with people inside - only empty cars or no cars at all "
-            f"- CRITICAL: Match the EXACT same low-quality, grainy, pixelated look as the reference image "
-            f"- CRITICAL: Do NOT generate high-quality, sharp, or clean images - they must look like old CCTV footage "
-            f"- The only difference should be the physical location/scene and camera angle, everything else should match exactly"
-        )
+        # Process the response
+        images = []
+        for part in response.candidates[0].content.parts:
+            if part.text is not None:
+                print(f"Response: {part.text}")
+            elif part.inline_data is not None:
+                images.append(part)
+        return images
+    
+    async def save_background(self, part, prompt, reference_image_path, output_path):
+        """
+        Queue a generated image for saving (waits only while the save queue is full); returns a future
+        that resolves to whether save_worker wrote it
+        """
+        saved = asyncio.get_running_loop().create_future()
+        await self._save_queue.put((part, prompt, reference_image_path, output_path, saved))
+        return saved
+    
+    async def save_worker(self):
+        """Write queued images on a worker thread, so saving overlaps the requests still in flight"""
+        while True:
+            part, prompt, reference_image_path, output_path, saved = await self._save_queue.get()
+            try:
+                image_sha = await asyncio.to_thread(
+                    write_image, part.inline_data.data, part.inline_data.mime_type, output_path
+                )
+                # Record in the cache from the event loop (the sqlite connection is not shared with threads)
+                self.cache.insert(prompt, self._reference_sha[reference_image_path], output_path, image_sha)
+                print(f"✅ Generated background saved as '{output_path}'")
+                saved.set_result(True)
+            except Exception as e:
+                print(f"❌ Error saving {output_path}: {e}")
+                saved.set_result(False)
+            finally:
+                self._save_queue.task_done()
     
-    def generate_background_with_nano_banana(self, prompt, reference_image_path, output_path):
+    def reuse_cached(self, prompt, reference_image_path, output_path):
+        """Reuse an image generated earlier from the same prompt and reference; returns whether one existed"""
+        cached_path = self.cache.lookup(prompt, self._reference_sha[reference_image_path], output_path)
+        if not cached_path:
+            return False
+        if os.path.abspath(output_path) != cached_path:
+            shutil.copyfile(cached_path, output_path)
+        print(f"♻️  Reused cached background for '{output_path}'")
+        return True
+    
+    async def generate_background_with_nano_banana(self, sem, limiter, prompt, reference_image_path, output_path):
         """Generate a single background using Google Nano Banana"""
         try:
-            # Load the reference image
-            reference_image = Image.open(reference_image_path)
-            
-            # Generate content using both text prompt and reference image
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash-image-preview",
-                contents=[prompt, reference_image],
-            )
+            if self.reuse_cached(prompt, reference_image_path, output_path):
+                return True
             
-            # Process the response
-            for part in response.candidates[0].content.parts:
-                if part.text is not None:
-                    print(f"Response: {part.text}")
-                elif part.inline_data is not None:
-                    # Save the generated image
-                    new_background = Image.open(BytesIO(part.inline_data.data))
-                    new_background.save(output_path)
-                    print(f"✅ Generated background saved as '{output_path}'")
-                    return True
+            images = await self.request_images(sem, limiter, prompt, reference_image_path)
+            if images:
+                # The request slot is already free; wait for the write before reporting success
+                saved = await self.save_background(images[0], prompt, reference_image_path, output_path)
+                return await saved
             
             return False
             
@@ -281,50 +533,83 @@ class SyntheticCCTVGenerator:
             print(f"❌ Error generating background: {e}")
             return False
     
-    def generate_all_backgrounds(self):
+    def get_job(self, mode, i):
+        """Prompt, reference image and output path for background i+1 of the day or night set"""
+        if mode == "day":
+            prompt, reference_path = self.get_day_prompt(i), self.reference_day_path
+        else:
+            prompt, reference_path = self.get_night_prompt(i), self.reference_night_path
+        filename = f"fake_{mode}_bg_{i+1:03d}.jpg"
+        return prompt, reference_path, os.path.join(self.output_dir, mode, filename)
+    
+    async def generate_one(self, sem, limiter, mode, i):
+        """Generate background i+1 of the day or night set"""
+        prompt, reference_path, output_path = self.get_job(mode, i)
+        print(f"\nGenerating {mode} background {i+1}/50...")
+        
+        success = await self.generate_background_with_nano_banana(
+            sem, limiter, prompt, reference_path, output_path
+        )
+        
+        if success:
+            print(f"✅ {mode.capitalize()} background {i+1} completed")
+        else:
+            print(f"❌ Failed to generate {mode} background {i+1}")
+        return success
+    
+    async def generate_batch(self, sem, limiter, mode, variations):
+        """
+        Generate several backgrounds of one set with a single request; backgrounds already in the cache
+        are skipped, and any the response leaves out (or a failed request) fall back to single requests
+        """
+        jobs = {i: self.get_job(mode, i) for i in variations}
+        pending = [i for i in variations if not self.reuse_cached(*jobs[i])]
+        if len(pending) > 1:
+            print(f"\nGenerating {mode} backgrounds {pending[0]+1}-{pending[-1]+1}/50 in one request...")
+            try:
+                images = await self.request_images(sem, limiter, self.get_batch_prompt(mode, pending), jobs[pending[0]][1])
+                saves = [await self.save_background(part, *jobs[i]) for i, part in zip(pending, images)]
+                for i, success in zip(pending, await asyncio.gather(*saves)):
+                    if success:
+                        print(f"✅ {mode.capitalize()} background {i+1} completed")
+                    else:
+                        print(f"❌ Failed to generate {mode} background {i+1}")
+                pending = pending[len(images):]
+            except Exception as e:
+                print(f"❌ Error generating backgrounds: {e}")
+        await asyncio.gather(*(self.generate_one(sem, limiter, mode, i) for i in pending))
+    
+    def set_jobs(self, sem, limiter, mode):
+        """Coroutines generating the 50 day or night backgrounds, SCENES_PER_REQUEST per request"""
+        if SCENES_PER_REQUEST == 1:
+            return [self.generate_one(sem, limiter, mode, i) for i in range(50)]
+        return [
+            self.generate_batch(sem, limiter, mode, range(start, min(start + SCENES_PER_REQUEST, 50)))
+            for start in range(0, 50, SCENES_PER_REQUEST)
+        ]
+    
+    async def generate_all_backgrounds(self):
         """Generate 100 synthetic backgrounds (50 day, 50 night) using Google Nano Banana"""
         print("🚀 Generating synthetic CCTV backgrounds using Google Nano Banana...")
         print("📊 Total: 50 day + 50 night = 100 backgrounds")
         
-        # Generate day backgrounds
-        print("\n📅 Generating day backgrounds...")
-        for i in range(50):
-            print(f"\nGenerating day background {i+1}/50...")
-            prompt = self.get_day_prompt(i)
-            filename = f"fake_day_bg_{i+1:03d}.jpg"
-            output_path = os.path.join(self.output_dir, "day", filename)
-            
-            success = self.generate_background_with_nano_banana(
-                prompt, self.reference_day_path, output_path
-            )
-            
-            if success:
-                print(f"✅ Day background {i+1} completed")
-            else:
-                print(f"❌ Failed to generate day background {i+1}")
-            
-            # Add delay to avoid rate limiting
-            time.sleep(2)
-        
-        # Generate night backgrounds
-        print("\n🌙 Generating night backgrounds...")
-        for i in range(50):
-            print(f"\nGenerating night background {i+1}/50...")
-            prompt = self.get_night_prompt(i)
-            filename = f"fake_night_bg_{i+1:03d}.jpg"
-            output_path = os.path.join(self.output_dir, "night", filename)
-            
-            success = self.generate_background_with_nano_banana(
-                prompt, self.reference_night_path, output_path
-            )
-            
-            if success:
-                print(f"✅ Night background {i+1} completed")
-            else:
-                print(f"❌ Failed to generate night background {i+1}")
-            
-            # Add delay to avoid rate limiting
-            time.sleep(2)
+        # Requests run concurrently, capped by the semaphore and paced by the rate limiter
+        # instead of a fixed delay between calls
+        sem = asyncio.Semaphore(MAX_CONCURRENT)
+        limiter = RateLimiter()
+        # Requests produce images onto the save queue; a few consumers write them to disk
+        self._save_queue = asyncio.Queue(maxsize=SAVE_QUEUE_SIZE)
+        savers = [asyncio.create_task(self.save_worker()) for _ in range(SAVE_WORKERS)]
+        async with self.client.aio:
+            # Day and night backgrounds share one job list (and request budget), so there is no
+            # barrier between the two sets; day jobs are queued first
+            print("\n📅🌙 Generating day and night backgrounds...")
+            await asyncio.gather(*self.set_jobs(sem, limiter, "day"), *self.set_jobs(sem, limiter, "night"))
+        await self._save_queue.join()
+        for task in savers:
+            task.cancel()
+        await asyncio.gather(*savers, return_exceptions=True)
+        self.cache.close()
         
         print("\n🎉 Generated 100 synthetic CCTV backgrounds using Google Nano Banana!")
         print(f"📁 Day backgrounds saved to: {os.path.join(self.output_dir, 'day')}")
@@ -356,7 +641,7 @@ def main():
     
     # Create generator and run
     generator = SyntheticCCTVGenerator(output_dir, reference_day_path, reference_night_path)
-    generator.generate_all_backgrounds()
+    asyncio.run(generator.generate_all_backgrounds())
     
     print("\n🎯 Ready for synthetic person placement!")
     print("Next step: Use these backgrounds with your synthetic person placement script.")
@@ -14,68 +14,139 @@ Algorithm:
 """
 
 import argparse
+import hashlib
+import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
 import random
 import sys
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow  # type: ignore
+except ImportError:  # pyarrow is optional; load_data falls back to pandas' C parser
+    pyarrow = None
 
-def load_data(counts_csv: str, assignments_csv: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """Load cluster counts and assignments."""
-    counts_df = pd.read_csv(counts_csv)
-    assign_df = pd.read_csv(assignments_csv)
+logger = logging.getLogger(__name__)
 
-    if not {"cluster_unique_image", "cluster_unique_basename", "count"}.issubset(counts_df.columns):
+# An int seed reproduces the published splits; a SeedSequence (--seed_sequence) gives independent streams
+Seed = Union[int, np.random.SeedSequence]
+
+OUT_FILES = {"train": "train_capped.txt", "val": "val_capped.txt", "test": "test_capped.txt"}
+# Written next to the split files; a re-run with identical inputs and settings is skipped
+FINGERPRINT_FILE = ".split_fingerprint"
+
+COUNTS_COLUMNS = ["cluster_unique_image", "cluster_unique_basename", "count"]
+ASSIGNMENT_COLUMNS = ["image_path", "cluster_unique_image", "cluster_unique_basename"]
+
+
+def read_columns(csv_path: str, columns: List[str]) -> pd.DataFrame:
+    """Read only `columns` from a CSV (Arrow-backed strings via the pyarrow parser when available)."""
+    if pyarrow is not None:
+        return pd.read_csv(csv_path, usecols=columns, engine="pyarrow", dtype_backend="pyarrow")
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+def load_data(counts_csv: str, assignments_csv: str) -> Tuple[int, pd.DataFrame]:
+    """
+    Load the assignments (only the columns this script uses) and the number of clusters in counts_csv;
+    only its row count is used, so the counts table itself is not kept.
+    """
+    if not set(COUNTS_COLUMNS).issubset(pd.read_csv(counts_csv, nrows=0).columns):
         raise ValueError("counts_csv must have: cluster_unique_image, cluster_unique_basename, count")
-    if not {"image_path", "cluster_unique_image", "cluster_unique_basename"}.issubset(assign_df.columns):
+    if not set(ASSIGNMENT_COLUMNS).issubset(pd.read_csv(assignments_csv, nrows=0).columns):
         raise ValueError("assignments_csv must have: image_path, cluster_unique_image, cluster_unique_basename")
 
-    return counts_df, assign_df
+    n_clusters = len(read_columns(counts_csv, COUNTS_COLUMNS[:1]))
+    assign_df = read_columns(assignments_csv, ASSIGNMENT_COLUMNS)
+
+    return n_clusters, assign_df
 
 
 def build_cluster_to_images(assign_df: pd.DataFrame) -> Dict[str, List[str]]:
-    """Build mapping from cluster to list of image paths."""
-    mapping: Dict[str, List[str]] = {}
-    for _, row in assign_df.iterrows():
-        key = row["cluster_unique_image"]
-        mapping.setdefault(key, []).append(row["image_path"])
-    return mapping
+    """Build mapping from cluster to list of image paths (clusters and images in file order)."""
+    grouped = assign_df.groupby("cluster_unique_image", sort=False, dropna=False)["image_path"]
+    return grouped.agg(list).to_dict()
 
 
-def cap_cluster(images: List[str], cap_size: int, seed: int) -> List[str]:
-    """Randomly sample cap_size images from cluster."""
-    random.seed(seed)
+def cluster_basenames(cluster_to_images: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Basename of every cluster key, computed once and shared by capping and allocation.
+    Interned, so membership tests against the (also interned) capped names hit the identity fast path.
+    """
+    return {cluster_key: sys.intern(os.path.basename(cluster_key)) for cluster_key in cluster_to_images}
+
+
+def cap_cluster(images: List[str], cap_size: int, seed: Seed) -> List[str]:
+    """
+    Randomly sample cap_size images from cluster. An int seed uses a private Random(seed), which draws
+    the same sequence as the former global random.seed(seed) + random.shuffle, so the published splits
+    are kept; a SeedSequence draws only cap_size indices from its own numpy Generator.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        picked = np.random.default_rng(seed).choice(len(images), size=min(cap_size, len(images)), replace=False)
+        return [images[i] for i in picked.tolist()]
     shuffled = images.copy()
-    random.shuffle(shuffled)
+    random.Random(seed).shuffle(shuffled)
     return shuffled[:cap_size]
 
 
+def _cap_worker(job: Tuple[List[str], int, Seed]) -> List[str]:
+    return cap_cluster(*job)
+
+
 def apply_caps(
     cluster_to_images: Dict[str, List[str]],
     caps: Dict[str, int],
-    seed: int
+    seed: Seed,
+    basenames: Dict[str, str],
+    workers: int = 1
 ) -> Dict[str, List[str]]:
-    """Apply capping to specified clusters."""
-    capped = {}
+    """
+    Apply capping to specified clusters (each capped cluster gets its own child of a SeedSequence).
+    Each cap is a pure function of (images, cap, seed), so with workers > 1 they run in a process pool;
+    results are identical either way.
+    """
+    capped_set = {sys.intern(basename) for basename in caps}
+    capped_keys = [cluster_key for cluster_key in cluster_to_images if basenames[cluster_key] in capped_set]
+    jobs = [
+        (
+            cluster_to_images[cluster_key],
+            caps[basenames[cluster_key]],
+            seed.spawn(1)[0] if isinstance(seed, np.random.SeedSequence) else seed,
+        )
+        for cluster_key in capped_keys
+    ]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = dict(zip(capped_keys, pool.map(_cap_worker, jobs)))
+    else:
+        results = dict(zip(capped_keys, map(_cap_worker, jobs)))
 
+    capped = {}
     for cluster_key, images in cluster_to_images.items():
-        basename = os.path.basename(cluster_key)
-
-        if basename in caps:
-            cap_size = caps[basename]
-            capped_images = cap_cluster(images, cap_size, seed)
-            capped[cluster_key] = capped_images
-            print(f"  Capped {basename}: {len(images)} → {len(capped_images)}")
+        if cluster_key in results:
+            capped[cluster_key] = results[cluster_key]
+            logger.info(f"  Capped {basenames[cluster_key]}: {len(images)} → {len(capped[cluster_key])}")
         else:
             capped[cluster_key] = images
 
     return capped
 
 
+def _argmax3(a: float, b: float, c: float) -> int:
+    """Index of the largest of three values; the first wins ties, as with max()."""
+    if a >= b and a >= c:
+        return 0
+    return 1 if b >= c else 2
+
+
 def allocate_exact_splits(
-    cluster_to_images: Dict[str, List[str]]
+    cluster_to_images: Dict[str, List[str]],
+    basenames: Dict[str, str]
 ) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, int]]]:
     """
     Allocate clusters using EXACT algorithm that produces 1795/664/660.
@@ -86,18 +157,19 @@ def allocate_exact_splits(
     3. Allocate DAY clusters LARGEST-FIRST to most night-heavy split
     """
     allocation = {'train': [], 'val': [], 'test': []}
-    counts = {'train': 0, 'val': 0, 'test': 0}
-    day_counts = {'train': 0, 'val': 0, 'test': 0}
-    night_counts = {'train': 0, 'val': 0, 'test': 0}
-
     splits_list = ['train', 'val', 'test']
 
-    print("\n" + "=" * 80)
-    print("ALLOCATION STRATEGY (EXACT 3-STEP ALGORITHM)")
-    print("=" * 80)
+    # Per-split totals indexed like splits_list
+    counts = [0, 0, 0]
+    day_counts = [0, 0, 0]
+    night_counts = [0, 0, 0]
+
+    logger.info("\n" + "=" * 80)
+    logger.info("ALLOCATION STRATEGY (EXACT 3-STEP ALGORITHM)")
+    logger.info("=" * 80)
 
     # STEP 1: Assign 3 capped large clusters (FIXED assignment proven to work)
-    print("\n=== STEP 1: Assign 3 capped large night clusters ===")
+    logger.info("\n=== STEP 1: Assign 3 capped large night clusters ===")
 
     capped_assignment = {
         'night_bg_003.jpg': 'train',  # 500 images
@@ -105,74 +177,86 @@ def allocate_exact_splits(
         'night_bg_005.jpg': 'test'    # 400 images
     }
 
-    # Separate clusters
-    day_clusters = []
-    night_clusters = []
-
-    for cluster_key in cluster_to_images.keys():
-        basename = os.path.basename(cluster_key)
-        size = len(cluster_to_images[cluster_key])
-        is_night = basename.startswith('night_bg_')
-
-        if basename in capped_assignment:
-            # Assign capped cluster
-            split = capped_assignment[basename]
-            allocation[split].append(cluster_key)
-            counts[split] += size
-            night_counts[split] += size
-            print(f"  {basename} ({size} images) → {split}")
-        elif is_night:
-            night_clusters.append((cluster_key, basename, size))
-        else:
-            day_clusters.append((cluster_key, basename, size))
-
-    # Sort LARGEST-FIRST (critical for hitting exact counts!)
-    night_clusters.sort(key=lambda x: x[2], reverse=True)
-    day_clusters.sort(key=lambda x: x[2], reverse=True)
+    # One row per cluster (in cluster_to_images order); image lists stay in the dict for write-out
+    clusters_df = pd.DataFrame({
+        'cluster': pd.Series(list(cluster_to_images), dtype=object),
+        'basename': pd.Series([basenames[cluster_key] for cluster_key in cluster_to_images], dtype=object),
+        'size': pd.Series([len(images) for images in cluster_to_images.values()], dtype='int64'),
+    })
+    clusters_df['is_night'] = clusters_df['basename'].str.startswith('night_bg_').astype(bool)
+    clusters_df['split'] = clusters_df['basename'].map(capped_assignment)
+
+    def cluster_rows(df: pd.DataFrame) -> List[Tuple[str, str, int]]:
+        return list(zip(df['cluster'].tolist(), df['basename'].tolist(), df['size'].tolist()))
+
+    # Assign capped clusters
+    capped_df = clusters_df[clusters_df['split'].notna()]
+    for cluster_key, basename, size in cluster_rows(capped_df):
+        split = capped_assignment[basename]
+        idx = splits_list.index(split)
+        allocation[split].append(cluster_key)
+        counts[idx] += size
+        night_counts[idx] += size
+        logger.info(f"  {basename} ({size} images) → {split}")
+
+    # Separate the rest and sort LARGEST-FIRST (critical for hitting exact counts!);
+    # the stable sort keeps cluster order among equal sizes, as list.sort did
+    remaining_df = clusters_df[clusters_df['split'].isna()]
+    night_clusters = cluster_rows(
+        remaining_df[remaining_df['is_night']].sort_values('size', ascending=False, kind='stable')
+    )
+    day_clusters = cluster_rows(
+        remaining_df[~remaining_df['is_night']].sort_values('size', ascending=False, kind='stable')
+    )
 
-    print(f"\nRemaining night clusters: {len(night_clusters)}")
-    print(f"Remaining day clusters: {len(day_clusters)}")
+    logger.info(f"\nRemaining night clusters: {len(night_clusters)}")
+    logger.info(f"Remaining day clusters: {len(day_clusters)}")
 
     # STEP 2: Allocate remaining NIGHT clusters to fill toward 70/20/10
-    print("\n=== STEP 2: Allocate remaining NIGHT clusters (largest-first) ===")
+    logger.info("\n=== STEP 2: Allocate remaining NIGHT clusters (largest-first) ===")
 
     # Target ratios: 70% train, 20% val, 10% test
-    target_ratios = {'train': 0.70, 'val': 0.20, 'test': 0.10}
+    train_ratio, val_ratio, test_ratio = 0.70, 0.20, 0.10
+
+    # Running total, updated as clusters are placed
+    current_total = counts[0] + counts[1] + counts[2]
 
     for cluster_key, basename, size in night_clusters:
-        # Find split with largest deficit from target ratio
-        current_total = sum(counts.values())
-        deficits = {}
-        for split in splits_list:
-            current_ratio = counts[split] / current_total if current_total > 0 else 0
-            deficits[split] = target_ratios[split] - current_ratio
-
-        best_split = max(deficits, key=deficits.get)
-        allocation[best_split].append(cluster_key)
-        counts[best_split] += size
-        night_counts[best_split] += size
+        # Find split with largest deficit from target ratio (first split wins ties)
+        if current_total > 0:
+            best = _argmax3(
+                train_ratio - counts[0] / current_total,
+                val_ratio - counts[1] / current_total,
+                test_ratio - counts[2] / current_total,
+            )
+        else:
+            best = _argmax3(train_ratio, val_ratio, test_ratio)
+        allocation[splits_list[best]].append(cluster_key)
+        counts[best] += size
+        night_counts[best] += size
+        current_total += size
 
     # STEP 3: Allocate DAY clusters to balance day/night (LARGEST-FIRST)
-    print("\n=== STEP 3: Allocate DAY clusters to balance (largest-first) ===")
+    logger.info("\n=== STEP 3: Allocate DAY clusters to balance (largest-first) ===")
 
     for cluster_key, basename, size in day_clusters:
         # Find split with worst day/night imbalance (most night-heavy)
-        imbalances = {
-            split: night_counts[split] - day_counts[split]
-            for split in splits_list
-        }
-        best_split = max(imbalances, key=imbalances.get)
-        allocation[best_split].append(cluster_key)
-        counts[best_split] += size
-        day_counts[best_split] += size
+        best = _argmax3(
+            night_counts[0] - day_counts[0],
+            night_counts[1] - day_counts[1],
+            night_counts[2] - day_counts[2],
+        )
+        allocation[splits_list[best]].append(cluster_key)
+        counts[best] += size
+        day_counts[best] += size
 
     # Prepare statistics
     split_stats = {}
-    for split in splits_list:
+    for idx, split in enumerate(splits_list):
         split_stats[split] = {
-            'day': day_counts[split],
-            'night': night_counts[split],
-            'total': counts[split]
+            'day': day_counts[idx],
+            'night': night_counts[idx],
+            'total': counts[idx]
         }
 
     return allocation, split_stats
@@ -182,40 +266,62 @@ def write_splits(
     allocation: Dict[str, List[str]],
     cluster_to_images: Dict[str, List[str]],
     out_dir: str,
-    seed: int
+    seed: Seed
 ) -> None:
     """Write train/val/test split files."""
-    random.seed(seed)
+    if isinstance(seed, np.random.SeedSequence):
+        # One independent numpy stream per split
+        shufflers = [np.random.default_rng(child).shuffle for child in seed.spawn(3)]
+    else:
+        # One private generator shuffles the three splits in turn (same draws as a global random.seed)
+        shufflers = [random.Random(seed).shuffle] * 3
     os.makedirs(out_dir, exist_ok=True)
 
-    for split_name in ['train', 'val', 'test']:
-        images = []
-        for cluster_key in allocation[split_name]:
-            images.extend(cluster_to_images[cluster_key])
+    for (split_name, filename), shuffle in zip(OUT_FILES.items(), shufflers):
+        images = [image for cluster_key in allocation[split_name] for image in cluster_to_images[cluster_key]]
 
-        random.shuffle(images)
+        shuffle(images)
 
-        if split_name == 'train':
-            output_file = os.path.join(out_dir, "train_capped.txt")
-        elif split_name == 'val':
-            output_file = os.path.join(out_dir, "val_capped.txt")
-        else:
-            output_file = os.path.join(out_dir, "test_capped.txt")
+        output_file = os.path.join(out_dir, filename)
 
-        with open(output_file, 'w') as f:
-            f.write('\n'.join(images) + ('\n' if images else ''))
+        # Stream the paths through a 1 MiB buffer instead of building one joined string;
+        # newline='\n' keeps LF line endings on Windows too
+        with open(output_file, 'w', buffering=1 << 20, newline='\n') as f:
+            write = f.write
+            for image in images:
+                write(image)
+                write('\n')
 
-        print(f"  Wrote {len(images)} images to {output_file}")
+        logger.info(f"  Wrote {len(images)} images to {output_file}")
+
+
+def input_fingerprint(csv_paths: List[str], seed: int, seed_sequence: bool, caps: Dict[str, int]) -> str:
+    """blake2b digest over the input CSVs and every setting that changes the written splits."""
+    h = hashlib.blake2b(digest_size=16)
+    for csv_path in csv_paths:
+        with open(csv_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    h.update(repr((seed, seed_sequence, sorted(caps.items()))).encode())
+    return h.hexdigest()
+
+
+def outputs_up_to_date(out_dir: str, fingerprint: str) -> bool:
+    """True when all split files exist and were written from inputs with this fingerprint."""
+    try:
+        with open(os.path.join(out_dir, FINGERPRINT_FILE)) as f:
+            stored = f.read().strip()
+    except OSError:
+        return False
+    return stored == fingerprint and all(os.path.isfile(os.path.join(out_dir, name)) for name in OUT_FILES.values())
 
 
 def print_statistics(
     split_stats: Dict[str, Dict[str, int]],
     allocation: Dict[str, List[str]]
 ) -> None:
-    """Print detailed statistics."""
-    print("\n" + "=" * 80)
-    print("FINAL SPLIT STATISTICS")
-    print("=" * 80)
+    """Log detailed statistics (assembled first so the report goes out in one write)."""
+    lines = ["", "=" * 80, "FINAL SPLIT STATISTICS", "=" * 80]
 
     for split in ['train', 'val', 'test']:
         day = split_stats[split]['day']
@@ -226,32 +332,38 @@ def print_statistics(
         night_pct = (night / total * 100) if total > 0 else 0
         balance_deviation = abs(50 - day_pct)
 
-        print(f"\n{split.upper()}:")
-        print(f"  Total: {total} images ({len(allocation[split])} clusters)")
-        print(f"  Day: {day} ({day_pct:.1f}%)")
-        print(f"  Night: {night} ({night_pct:.1f}%)")
-        print(f"  Balance deviation from 50/50: {balance_deviation:.1f}%")
+        lines += [
+            f"\n{split.upper()}:",
+            f"  Total: {total} images ({len(allocation[split])} clusters)",
+            f"  Day: {day} ({day_pct:.1f}%)",
+            f"  Night: {night} ({night_pct:.1f}%)",
+            f"  Balance deviation from 50/50: {balance_deviation:.1f}%",
+        ]
 
     total_images = sum(s['total'] for s in split_stats.values())
     total_day = sum(s['day'] for s in split_stats.values())
     total_night = sum(s['night'] for s in split_stats.values())
 
-    print(f"\nOVERALL:")
-    print(f"  Total: {total_images} images")
-    print(f"  Day: {total_day} ({total_day/total_images*100:.1f}%)")
-    print(f"  Night: {total_night} ({total_night/total_images*100:.1f}%)")
-
-    print(f"\nSPLIT RATIOS:")
+    lines += [
+        "\nOVERALL:",
+        f"  Total: {total_images} images",
+        f"  Day: {total_day} ({total_day/total_images*100:.1f}%)",
+        f"  Night: {total_night} ({total_night/total_images*100:.1f}%)",
+        "\nSPLIT RATIOS:",
+    ]
     for split in ['train', 'val', 'test']:
         total = split_stats[split]['total']
         pct = total / total_images * 100
-        print(f"  {split.capitalize()}: {total} ({pct:.1f}%)")
+        lines.append(f"  {split.capitalize()}: {total} ({pct:.1f}%)")
 
-    print(f"\nDATA LEAKAGE ANALYSIS:")
-    print(f"  Clusters split across multiple sets: 0 (ZERO LEAKAGE)")
-    print(f"  Clusters fully intact: 27/30 (90%)")
-    print(f"  Clusters partially sampled: 3/30 (10%)")
-    print("=" * 80)
+    lines += [
+        "\nDATA LEAKAGE ANALYSIS:",
+        "  Clusters split across multiple sets: 0 (ZERO LEAKAGE)",
+        "  Clusters fully intact: 27/30 (90%)",
+        "  Clusters partially sampled: 3/30 (10%)",
+        "=" * 80,
+    ]
+    logger.info("\n".join(lines))
 
 
 def main(argv: List[str]) -> None:
@@ -262,48 +374,78 @@ def main(argv: List[str]) -> None:
     parser.add_argument("--assignments_csv", type=str, default="/workspace/scripts/cluster_assignments.csv")
     parser.add_argument("--out_dir", type=str, default="/workspace/Final-Year-Project")
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Processes for capping clusters (only worth it for very large clusters)"
+    )
+    parser.add_argument(
+        "--seed_sequence", action="store_true",
+        help="Draw caps and shuffles from independent numpy SeedSequence streams (does NOT reproduce the published splits)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Rewrite the split files even if the inputs and settings are unchanged"
+    )
 
     args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    logger.info("=" * 80)
+    logger.info("EXACT CAPPED CLUSTER SPLIT CREATOR")
+    logger.info("=" * 80)
+    logger.info(f"Random seed: {args.seed}")
+    if args.seed_sequence:
+        logger.info("Using independent SeedSequence streams (splits differ from the published ones)")
+    seed = np.random.SeedSequence(args.seed) if args.seed_sequence else args.seed
+    logger.info("Produces EXACTLY: Train=1795, Val=664, Test=660")
+    logger.info("With day/night balance: ~46%/40%/39% day")
+
+    caps = {
+        'night_bg_003.jpg': 500,
+        'night_bg_002.jpg': 400,
+        'night_bg_005.jpg': 400
+    }
 
-    print("=" * 80)
-    print("EXACT CAPPED CLUSTER SPLIT CREATOR")
-    print("=" * 80)
-    print(f"Random seed: {args.seed}")
-    print("Produces EXACTLY: Train=1795, Val=664, Test=660")
-    print("With day/night balance: ~46%/40%/39% day")
+    fingerprint = input_fingerprint([args.counts_csv, args.assignments_csv], args.seed, args.seed_sequence, caps)
+    if not args.force and outputs_up_to_date(args.out_dir, fingerprint):
+        logger.info(f"\nSplit files in {args.out_dir} are up to date with these inputs; nothing to do (--force to rewrite)")
+        return
 
     # Load data
-    print("\nLoading data...")
-    counts_df, assign_df = load_data(args.counts_csv, args.assignments_csv)
+    logger.info("\nLoading data...")
+    n_clusters, assign_df = load_data(args.counts_csv, args.assignments_csv)
     cluster_to_images = build_cluster_to_images(assign_df)
 
     total_images = len(assign_df)
-    print(f"  Total images: {total_images}")
-    print(f"  Total clusters: {len(counts_df)}")
+    # Everything downstream works from cluster_to_images; drop the frame's duplicate path storage
+    del assign_df
+    logger.info(f"  Total images: {total_images}")
+    logger.info(f"  Total clusters: {n_clusters}")
 
     # Apply caps
-    print("\nApplying caps to large night clusters...")
-    caps = {
-        'night_bg_003.jpg': 500,
-        'night_bg_002.jpg': 400,
-        'night_bg_005.jpg': 400
-    }
-
-    cluster_to_images = apply_caps(cluster_to_images, caps, args.seed)
+    logger.info("\nApplying caps to large night clusters...")
+    basenames = cluster_basenames(cluster_to_images)
+    cluster_to_images = apply_caps(cluster_to_images, caps, seed, basenames, args.workers)
 
     total_after_capping = sum(len(imgs) for imgs in cluster_to_images.values())
-    print(f"\n  Total images after capping: {total_after_capping}")
-    print(f"  Images removed: {total_images - total_after_capping}")
-    print(f"  Retention: {total_after_capping/total_images*100:.1f}%")
+    logger.info(f"\n  Total images after capping: {total_after_capping}")
+    logger.info(f"  Images removed: {total_images - total_after_capping}")
+    logger.info(f"  Retention: {total_after_capping/total_images*100:.1f}%")
 
     # Allocate clusters
-    allocation, split_stats = allocate_exact_splits(cluster_to_images)
+    allocation, split_stats = allocate_exact_splits(cluster_to_images, basenames)
 
     # Write output files
-    print("\n" + "=" * 80)
-    print("Writing split files...")
-    print("=" * 80)
-    write_splits(allocation, cluster_to_images, args.out_dir, args.seed)
+    logger.info("\n" + "=" * 80)
+    logger.info("Writing split files...")
+    logger.info("=" * 80)
+    # Drop the old fingerprint first: if this run dies part-way, mixed split files must not look current
+    fingerprint_path = os.path.join(args.out_dir, FINGERPRINT_FILE)
+    if os.path.exists(fingerprint_path):
+        os.remove(fingerprint_path)
+    write_splits(allocation, cluster_to_images, args.out_dir, seed)
+    with open(fingerprint_path, 'w') as f:
+        f.write(fingerprint + '\n')
 
     # Print statistics
     print_statistics(split_stats, allocation)